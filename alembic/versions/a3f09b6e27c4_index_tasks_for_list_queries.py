@@ -0,0 +1,30 @@
+"""Index tasks for list queries
+
+Revision ID: a3f09b6e27c4
+Revises: 5c2e8d1f4a7b
+Create Date: 2026-10-17 10:03:55.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f09b6e27c4'
+down_revision: Union[str, Sequence[str], None] = '5c2e8d1f4a7b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The primary key is already indexed; ix_tasks_id only added write cost
+    op.drop_index('ix_tasks_id', table_name='tasks')
+    op.create_index('ix_tasks_status_id', 'tasks', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_status_id', table_name='tasks')
+    op.create_index('ix_tasks_id', 'tasks', ['id'], unique=False)
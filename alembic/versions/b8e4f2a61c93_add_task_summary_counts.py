@@ -0,0 +1,102 @@
+"""Add task summary counts
+
+Revision ID: b8e4f2a61c93
+Revises: d71b4c9e0a52
+Create Date: 2026-10-17 14:05:12.377940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e4f2a61c93'
+down_revision: Union[str, Sequence[str], None] = 'd71b4c9e0a52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tasks', sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True))
+    # The best estimate of when existing tasks were completed
+    op.execute("UPDATE tasks SET completed_at = updated_at WHERE status = 'completed'")
+
+    # Triggers keep the counts current on SQLite; other backends aggregate tasks instead,
+    # so the summary tables would only go stale there
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.create_table('task_status_counts',
+    sa.Column('status', sa.Enum('pending', 'in_progress', 'completed', name='taskstatus'), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('status')
+    )
+    op.create_table('task_daily_counts',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('created', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.execute(
+        "INSERT INTO task_status_counts (status, count) "
+        "SELECT status, COUNT(*) FROM tasks GROUP BY status"
+    )
+    op.execute(
+        "INSERT INTO task_daily_counts (day, created, completed) "
+        "SELECT day, SUM(created), SUM(completed) FROM ("
+        "SELECT date(created_at) AS day, 1 AS created, 0 AS completed FROM tasks "
+        "UNION ALL "
+        "SELECT date(completed_at), 0, 1 FROM tasks WHERE completed_at IS NOT NULL"
+        ") AS events GROUP BY day"
+    )
+    op.execute(
+        "CREATE TRIGGER task_stats_ai AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO task_status_counts(status, count) VALUES (new.status, 1) "
+        "ON CONFLICT(status) DO UPDATE SET count = count + 1; "
+        "INSERT INTO task_daily_counts(day, created, completed) "
+        "VALUES (date(new.created_at), 1, 0) "
+        "ON CONFLICT(day) DO UPDATE SET created = created + 1; "
+        "INSERT INTO task_daily_counts(day, created, completed) "
+        "SELECT date(new.completed_at), 0, 1 WHERE new.completed_at IS NOT NULL "
+        "ON CONFLICT(day) DO UPDATE SET completed = completed + 1; "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER task_stats_ad AFTER DELETE ON tasks BEGIN "
+        "UPDATE task_status_counts SET count = count - 1 WHERE status = old.status; "
+        "UPDATE task_daily_counts SET created = created - 1 WHERE day = date(old.created_at); "
+        "UPDATE task_daily_counts SET completed = completed - 1 "
+        "WHERE day = date(old.completed_at); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER task_stats_au_status AFTER UPDATE OF status ON tasks "
+        "WHEN old.status IS NOT new.status BEGIN "
+        "UPDATE task_status_counts SET count = count - 1 WHERE status = old.status; "
+        "INSERT INTO task_status_counts(status, count) VALUES (new.status, 1) "
+        "ON CONFLICT(status) DO UPDATE SET count = count + 1; "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER task_stats_au_completed AFTER UPDATE OF completed_at ON tasks "
+        "WHEN old.completed_at IS NOT new.completed_at BEGIN "
+        "UPDATE task_daily_counts SET completed = completed - 1 "
+        "WHERE day = date(old.completed_at); "
+        "INSERT INTO task_daily_counts(day, created, completed) "
+        "SELECT date(new.completed_at), 0, 1 WHERE new.completed_at IS NOT NULL "
+        "ON CONFLICT(day) DO UPDATE SET completed = completed + 1; "
+        "END"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        for trigger in ('task_stats_au_completed', 'task_stats_au_status',
+                        'task_stats_ad', 'task_stats_ai'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.drop_table('task_daily_counts')
+        op.drop_table('task_status_counts')
+    op.drop_column('tasks', 'completed_at')
@@ -0,0 +1,4 @@
+import time
+
+# Start of the app's import, so the startup report can include it
+IMPORT_STARTED = time.perf_counter()
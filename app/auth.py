@@ -1,33 +1,22 @@
 import hashlib
+import time
 from datetime import datetime, timedelta, timezone
+from typing import Any
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from pydantic import BaseModel
 
+from app.cache import token_cache
 from app.config import get_settings
+from app.metrics import JWT_VERIFY_SECONDS
 
 settings = get_settings()
 
 security = HTTPBearer()
 
 
-def hash_password(password: str) -> str:
-    return hashlib.pbkdf2_hmac("sha256", password.encode(), b"static-salt-for-demo", 100000).hex()
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return hash_password(plain_password) == hashed_password
-
-
-# Demo user (in production, use database with proper salting)
-DEMO_USER: dict[str, str] = {
-    "username": "admin",
-    "hashed_password": hash_password("admin"),
-}
-
-
 class Token(BaseModel):
     access_token: str
     refresh_token: str
@@ -82,21 +71,45 @@ def verify_refresh_token(token: str) -> str:
         ) from None
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Invalid authentication credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def verify_access_token(token: str) -> tuple[str, int | None]:
+    """Decode an access token, returning its subject and exp; raise JWTError if invalid."""
+    with JWT_VERIFY_SECONDS.time():
+        payload: dict[str, Any] = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
+    if payload.get("type") != "access":
+        raise JWTError("Invalid token type")
+    username = payload.get("sub")
+    if not isinstance(username, str):
+        raise JWTError("Missing subject")
+    exp = payload.get("exp")
+    return username, exp if isinstance(exp, int) else None
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> str:
+    token = credentials.credentials
+    key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(key)
+    # Same expiry rule as jose: valid through the second named by exp
+    if cached is not None and cached[1] >= int(time.time()):
+        return cached[0]
     try:
-        payload: dict[str, str] = jwt.decode(
-            credentials.credentials, settings.secret_key, algorithms=["HS256"]
-        )
-        if payload.get("type") != "access":
-            raise credentials_exception
-        username: str | None = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        return username
+        username, exp = verify_access_token(token)
     except JWTError:
-        raise credentials_exception from None
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        ) from None
+    if exp is not None:
+        token_cache.set(key, (username, exp), ttl=exp + 1 - time.time())
+    return username
+
+
+async def get_current_admin(username: str = Depends(get_current_user)) -> str:
+    if username not in settings.admin_users:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return username
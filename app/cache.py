@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any, Generic, TypeVar
+
+from app.config import get_settings
+from app.metrics import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES
+from app.models import SearchMode, TaskStatus
+from app.serializers import TaskBody
+
+settings = get_settings()
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+# Left by pop so a read that started before the removal cannot fill the entry again
+_REMOVED: Any = object()
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe, size-bounded LRU cache whose entries expire after a TTL.
+
+    Hits, misses and evictions are counted on /metrics under the cache name.
+    Each process has its own cache, so the TTL bounds how stale an entry
+    written by another worker can be.
+
+    Writers `set` and `pop`; readers that load a missing value `fill` it,
+    which never replaces what a write left in the meantime.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = CACHE_HITS.labels(name)
+        self._misses = CACHE_MISSES.labels(name)
+        self._evictions = CACHE_EVICTIONS.labels(name)
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not _REMOVED:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits.inc()
+                    return entry[1]
+                del self._entries[key]
+        self._misses.inc()
+        return None
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def fill(self, key: K, value: V) -> None:
+        """Cache a value read after a miss, unless a write has set or popped the key since.
+
+        The writer's entry is at least as current as anything the read saw,
+        so a read that lost the race leaves it alone.
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self._store(key, value, None)
+
+    def pop(self, key: K) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._store(key, _REMOVED, None)
+
+    def _store(self, key: K, value: V, ttl: float | None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._evictions.inc()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Serialized TaskResponse JSON keyed by task id, kept current by the write routes
+task_cache: LRUCache[int, TaskBody] = LRUCache(
+    "task", settings.task_cache_size, settings.task_cache_ttl_seconds
+)
+
+# Verified access tokens keyed by SHA-256 digest, holding (subject, exp)
+token_cache: LRUCache[bytes, tuple[str, int]] = LRUCache(
+    "token", settings.token_cache_size, settings.access_token_expire_minutes * 60
+)
+
+# Matching-task totals for list searches keyed by (status, search, search_mode); writes
+# do not touch it, so a count is up to the TTL old
+count_cache: LRUCache[tuple[TaskStatus | None, str, SearchMode], int] = LRUCache(
+    "count", settings.count_cache_size, settings.count_cache_ttl_seconds
+)
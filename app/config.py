@@ -8,18 +8,107 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str = "sqlite:///./tasks.db"
+    # Optional replica for read-only endpoints (list, get, health)
+    database_read_url: str | None = None
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_pre_ping: bool = False
+    db_pool_recycle: int = -1
+    db_pool_timeout: float = 30.0
+    # Serve requests with an asyncio driver (aiosqlite / asyncpg) instead of the threadpool
+    async_database: bool = False
+
+    # SQLite tuning, applied to file databases: one serialized writer connection
+    # plus a pool of read-only reader connections
+    sqlite_tuning: bool = True
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -32000  # negative values are KiB
+    sqlite_temp_store: str = "MEMORY"
+    sqlite_reader_pool_size: int = 8
 
     # Auth
     secret_key: str = "dev-secret-key-change-in-production"
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
+    # Verified access tokens remembered per process until they expire (0 disables it)
+    token_cache_size: int = 10000
+    # scrypt cost for password hashes; stored hashes made with other values are
+    # rehashed with these on the user's next successful login
+    password_scrypt_n: int = 2**14
+    password_scrypt_r: int = 8
+    password_scrypt_p: int = 1
+    # Worker processes that hash and verify passwords (0 uses the threadpool)
+    password_hash_workers: int = 2
+    # Create the demo admin/admin user when the users table is empty; disable in production
+    seed_demo_user: bool = True
+    # Users allowed on the /debug endpoints
+    admin_users: list[str] = ["admin"]
 
     # Server
     debug: bool = False
     allowed_origins: list[str] = ["http://localhost:3000"]
+    # Run Alembic migrations (and seed the demo user) when the app starts; app.serve
+    # does it once in the launcher and turns it off for its workers
+    migrate_on_startup: bool = True
+    # python -m app.serve: worker processes (0 means one per CPU), sockets and shutdown
+    server_host: str = "127.0.0.1"
+    server_port: int = 8000
+    server_workers: int = 0
+    server_backlog: int = 2048
+    server_keepalive_timeout: int = 5
+    server_graceful_timeout: int = 30  # seconds SIGTERM waits for in-flight requests
+    # Threads running sync endpoints and database calls, per worker (anyio defaults to 40)
+    threadpool_size: int = 40
+
+    # Logging: records are formatted and written on a background thread through a
+    # queue of this size (0 writes synchronously); records are dropped when it is full
+    log_queue_size: int = 10000
+    # Fraction of successful (< 400) access log lines to keep; errors are always kept
+    access_log_sample_rate: float = 1.0
+
+    # SQL instrumentation: statements and database time per request go to the access
+    # log and db_*_per_request metrics; statements slower than this are logged
+    sql_stats: bool = True
+    sql_slow_query_ms: float = 200.0
+    # Warn when one request runs more statements than this, the mark of an N+1 query
+    sql_statements_warn: int = 50
+
+    # Profiling: GET /debug/profile samples the live worker when enabled (admins only),
+    # and a percent above 0 saves a profile of that slowest share of requests to
+    # profile_dir, keeping the newest profile_keep files
+    profiling_enabled: bool = False
+    profile_interval_ms: float = 10.0
+    profile_slow_percent: float = 0.0
+    profile_dir: str = "profiles"
+    profile_keep: int = 100
 
     # Rate limiting
     rate_limit: str = "100/minute"
+    login_rate_limit: str = "10/minute"
+    # "memory://" limits each worker process separately; a file such as
+    # "sqlite:////dev/shm/task-api-ratelimit.db" is shared by all workers on the host
+    rate_limit_storage_url: str = "memory://"
+
+    # Bulk endpoints
+    max_batch_size: int = 1000
+    # Rows per export query; an export holds a read connection only while fetching one
+    export_batch_size: int = 1000
+    import_chunk_size: int = 5000  # Rows validated and committed per transaction on import
+    import_max_errors: int = 100  # Line errors reported per import (all are counted)
+    # Longest NDJSON line or CSV record accepted on import; only this much is buffered
+    import_max_line_bytes: int = 1_048_576
+
+    # In-process cache of GET /tasks/{id} responses (size 0 disables it)
+    task_cache_size: int = 10000
+    task_cache_ttl_seconds: float = 30.0
+
+    # include_total=true on GET /tasks: counts for searches are cached per process for
+    # this long and reported as estimated; plain and status-only counts are always exact
+    count_cache_size: int = 1000
+    count_cache_ttl_seconds: float = 10.0
 
 
 @lru_cache
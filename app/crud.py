@@ -1,21 +1,216 @@
-from typing import Any
+from collections.abc import AsyncIterator, Callable, Iterator, Sequence
+from datetime import date, datetime
+from typing import Any, Concatenate, ParamSpec, TypeVar
 
+from pydantic import TypeAdapter
+from sqlalchemy import (
+    ColumnElement,
+    FromClause,
+    Row,
+    Select,
+    bindparam,
+    case,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.database import TaskDB, utc_now
-from app.models import TaskCreate, TaskStatus, TaskUpdate
+from app.database import (
+    TaskDB,
+    UserDB,
+    daily_task_counts,
+    task_daily_counts,
+    task_status_counts,
+    tasks_fts,
+    utc_now,
+)
+from app.models import SearchMode, TaskBatchUpdate, TaskCreate, TaskStatus, TaskUpdate
 
+# The trigram tokenizer cannot match terms shorter than this
+FTS_MIN_TERM_LENGTH = 3
 
-def create_task(db: Session, task: TaskCreate) -> TaskDB:
-    db_task = TaskDB(
-        title=task.title,
-        description=task.description,
-        status=task.status,
+_task_list = TypeAdapter(list[TaskCreate])
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+async def run(
+    db: Session | AsyncSession,
+    fn: Callable[Concatenate[Session, P], T],
+    *args: P.args,
+    **kwargs: P.kwargs,
+) -> T:
+    """Await a crud function on either kind of session.
+
+    With an AsyncSession the function runs on the event loop and its IO is
+    awaited on the asyncio driver; a plain Session is sent to the threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+async def release(db: Session | AsyncSession) -> None:
+    """End the session's transaction and return its connection to the pool.
+
+    The session stays usable and checks a connection out again when next used.
+    """
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        await run_in_threadpool(db.close)
+
+
+def _completed_at(status: TaskStatus, now: datetime) -> datetime | None:
+    return now if status is TaskStatus.completed else None
+
+
+def _completed_at_on_update(status: Any, now: datetime) -> ColumnElement[Any]:
+    """completed_at for a task being set to `status`: kept if it was already completed."""
+    table = TaskDB.__table__
+    return case(
+        (
+            status == TaskStatus.completed,
+            case((table.c.status == TaskStatus.completed, table.c.completed_at), else_=now),
+        ),
+        else_=None,
     )
-    db.add(db_task)
+
+
+def create_task(db: Session, task: TaskCreate) -> Row[Any]:
+    table = TaskDB.__table__
+    values = task.model_dump()
+    values["completed_at"] = _completed_at(task.status, utc_now())
+    row = db.execute(insert(table).values(**values).returning(*table.c)).one()
+    db.commit()
+    return row
+
+
+def create_tasks(db: Session, tasks: Sequence[TaskCreate]) -> list[Row[Any]]:
+    """Insert tasks in one multi-row INSERT ... RETURNING, in input order."""
+    if not tasks:
+        return []
+    now = utc_now()
+    table = TaskDB.__table__
+    rows = db.execute(
+        insert(table).returning(*table.c, sort_by_parameter_order=True),
+        [
+            {
+                **task.model_dump(),
+                "created_at": now,
+                "updated_at": now,
+                "completed_at": _completed_at(task.status, now),
+            }
+            for task in tasks
+        ],
+    ).all()
+    db.commit()
+    return list(rows)
+
+
+def import_tasks(db: Session, tasks: list[TaskCreate]) -> int:
+    """Insert validated tasks without returning them and commit them as one chunk.
+
+    On SQLite the chunk travels as one JSON parameter unpacked by json_each,
+    making it a single INSERT ... SELECT: no per-row parameter processing,
+    and the FTS trigger indexes the chunk within one statement, which is
+    several times faster than the thousands of statements executemany runs.
+    """
+    table = TaskDB.__table__
+    now = utc_now()
+    if db.get_bind().dialect.name == "sqlite":
+        row = func.json_each(_task_list.dump_json(tasks).decode()).table_valued("value").c.value
+        # Enum columns store member names, which match the JSON values here
+        fields = ("title", "description", "status")
+        completed = func.json_extract(row, "$.status") == TaskStatus.completed.value
+        db.execute(
+            insert(table).from_select(
+                [*fields, "created_at", "updated_at", "completed_at"],
+                select(
+                    *(func.json_extract(row, f"$.{field}") for field in fields),
+                    literal(now, table.c.created_at.type),
+                    literal(now, table.c.updated_at.type),
+                    case((completed, literal(now, table.c.completed_at.type))),
+                ),
+            )
+        )
+    else:
+        db.execute(
+            insert(table),
+            [
+                {
+                    **task.model_dump(),
+                    "created_at": now,
+                    "updated_at": now,
+                    "completed_at": _completed_at(task.status, now),
+                }
+                for task in tasks
+            ],
+        )
     db.commit()
-    db.refresh(db_task)
-    return db_task
+    return len(tasks)
+
+
+def _fts_query(search: str, mode: SearchMode) -> str:
+    """Build an FTS5 query that matches `search` as a literal substring."""
+    phrase = '"' + search.replace('"', '""') + '"'
+    return f"title : {phrase}" if mode is SearchMode.title_only else phrase
+
+
+def _use_fts(db: Session | AsyncSession, search: str) -> bool:
+    return db.get_bind().dialect.name == "sqlite" and len(search) >= FTS_MIN_TERM_LENGTH
+
+
+def is_ranked(db: Session | AsyncSession, search: str | None, rank: bool) -> bool:
+    """Whether get_tasks orders by relevance: only for a search the full-text index serves.
+
+    Other searches come back in id order even with `rank`, so they page by
+    cursor like any list. Reads only the dialect, so it does no IO.
+    """
+    return rank and search is not None and _use_fts(db, search)
+
+
+def _search_fallback(search: str, mode: SearchMode) -> ColumnElement[bool]:
+    pattern = f"%{search}%"
+    if mode is SearchMode.title_only:
+        return TaskDB.title.ilike(pattern)
+    return or_(TaskDB.title.ilike(pattern), TaskDB.description.ilike(pattern))
+
+
+def _tasks_query(
+    db: Session,
+    status: TaskStatus | None,
+    search: str | None,
+    search_mode: SearchMode,
+    rank: bool = False,
+) -> tuple[Select[Any], bool]:
+    """Build the filtered SELECT shared by listing and export; also report if ranked."""
+    table = TaskDB.__table__
+    query = select(table)
+    if status is not None:
+        query = query.where(table.c.status == status)
+    ranked = is_ranked(db, search, rank)
+    if search is not None:
+        if not _use_fts(db, search):
+            query = query.where(_search_fallback(search, search_mode))
+        elif ranked:
+            query = query.join(tasks_fts, tasks_fts.c.rowid == table.c.id).where(
+                tasks_fts.c.tasks_fts.match(_fts_query(search, search_mode))
+            )
+        else:
+            matches = select(tasks_fts.c.rowid).where(
+                tasks_fts.c.tasks_fts.match(_fts_query(search, search_mode))
+            )
+            query = query.where(table.c.id.in_(matches))
+    return query, ranked
 
 
 def get_tasks(
@@ -24,13 +219,99 @@ def get_tasks(
     search: str | None = None,
     skip: int = 0,
     limit: int = 100,
-) -> list[Any]:
-    query = db.query(TaskDB)
-    if status is not None:
-        query = query.filter(TaskDB.status == status)
-    if search is not None:
-        query = query.filter(TaskDB.title.ilike(f"%{search}%"))
-    return query.offset(skip).limit(limit).all()
+    after_id: int | None = None,
+    search_mode: SearchMode = SearchMode.title_only,
+    rank: bool = False,
+) -> list[Row[Any]]:
+    """Return matching tasks as Core rows, skipping ORM identity-map overhead."""
+    table = TaskDB.__table__
+    query, ranked = _tasks_query(db, status, search, search_mode, rank)
+    if after_id is not None:
+        # Keyset pagination: seek past the previous page instead of counting rows
+        query = query.where(table.c.id > after_id)
+    # Equal ranks fall back to id, so offset pages neither repeat nor skip rows
+    order = (tasks_fts.c.rank, table.c.id) if ranked else (table.c.id,)
+    return list(db.execute(query.order_by(*order).offset(skip).limit(limit)).all())
+
+
+def count_tasks(
+    db: Session,
+    status: TaskStatus | None = None,
+    search: str | None = None,
+    search_mode: SearchMode = SearchMode.title_only,
+) -> int:
+    """Count the tasks get_tasks would return without paging.
+
+    Without a search, SQLite reads the summary counts, one row per status;
+    elsewhere the status filter is counted from ix_tasks_status_id. A
+    search counts every match, costing about as much as listing them all.
+    """
+    if search is None and db.get_bind().dialect.name == "sqlite":
+        total = select(func.coalesce(func.sum(task_status_counts.c.count), 0))
+        if status is not None:
+            total = total.where(task_status_counts.c.status == status)
+        return int(db.execute(total).scalar_one())
+    query, _ = _tasks_query(db, status, search, search_mode)
+    count = query.with_only_columns(func.count(), maintain_column_froms=True)
+    return int(db.execute(count).scalar_one())
+
+
+def _export_query(
+    db: Session,
+    status: TaskStatus | None,
+    search: str | None,
+    search_mode: SearchMode,
+    batch_size: int,
+) -> Select[Any]:
+    table = TaskDB.__table__
+    query, _ = _tasks_query(db, status, search, search_mode)
+    return query.where(table.c.id > bindparam("last_id")).order_by(table.c.id).limit(batch_size)
+
+
+def stream_tasks(
+    db: Session,
+    status: TaskStatus | None = None,
+    search: str | None = None,
+    search_mode: SearchMode = SearchMode.title_only,
+    batch_size: int = 1000,
+) -> Iterator[Sequence[Row[Any]]]:
+    """Yield every matching task in id order, `batch_size` rows at a time.
+
+    Each batch is one keyset query after the last id sent, and the session
+    returns its connection to the pool before the batch is yielded, so a
+    slow client holds no connection while it reads. Memory stays bounded by
+    one batch; rows written during the export show as of their batch.
+    """
+    query = _export_query(db, status, search, search_mode, batch_size)
+    last_id = 0
+    while True:
+        batch = db.execute(query, {"last_id": last_id}).all()
+        db.close()
+        if batch:
+            yield batch
+        if len(batch) < batch_size:
+            return
+        last_id = batch[-1].id
+
+
+async def astream_tasks(
+    db: AsyncSession,
+    status: TaskStatus | None = None,
+    search: str | None = None,
+    search_mode: SearchMode = SearchMode.title_only,
+    batch_size: int = 1000,
+) -> AsyncIterator[Sequence[Row[Any]]]:
+    """The AsyncSession counterpart of stream_tasks."""
+    query = _export_query(db.sync_session, status, search, search_mode, batch_size)
+    last_id = 0
+    while True:
+        batch = (await db.execute(query, {"last_id": last_id})).all()
+        await db.close()
+        if batch:
+            yield batch
+        if len(batch) < batch_size:
+            return
+        last_id = batch[-1].id
 
 
 def get_task(db: Session, task_id: int) -> TaskDB | None:
@@ -38,26 +319,117 @@ def get_task(db: Session, task_id: int) -> TaskDB | None:
     return result
 
 
-def update_task(db: Session, task_id: int, task: TaskUpdate) -> TaskDB | None:
-    db_task = get_task(db, task_id)
-    if db_task is None:
-        return None
-
+def update_task(
+    db: Session,
+    task_id: int,
+    task: TaskUpdate,
+    if_versions: Sequence[datetime] | None = None,
+) -> Row[Any] | None:
+    """Update a task, only if its updated_at is in `if_versions` when given."""
+    table = TaskDB.__table__
     update_data = task.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_task, field, value)
+    now = utc_now()
+    if update_data.get("status") is not None:
+        status = literal(update_data["status"], table.c.status.type)
+        update_data["completed_at"] = _completed_at_on_update(status, now)
+    stmt = update(table).where(table.c.id == task_id)
+    if if_versions is not None:
+        stmt = stmt.where(table.c.updated_at.in_(if_versions))
+    row = db.execute(stmt.values(**update_data, updated_at=now).returning(*table.c)).first()
+    db.commit()
+    return row
+
+
+def delete_task(db: Session, task_id: int, if_versions: Sequence[datetime] | None = None) -> bool:
+    """Delete a task, only if its updated_at is in `if_versions` when given."""
+    table = TaskDB.__table__
+    stmt = delete(table).where(table.c.id == task_id)
+    if if_versions is not None:
+        stmt = stmt.where(table.c.updated_at.in_(if_versions))
+    deleted_id = db.execute(stmt.returning(table.c.id)).scalar_one_or_none()
+    db.commit()
+    return deleted_id is not None
+
+
+def update_tasks(db: Session, items: Sequence[TaskBatchUpdate]) -> dict[int, Row[Any]]:
+    """Apply partial updates in one transaction, returning updated rows by id.
+
+    Items are grouped by the fields they set so each group is one
+    executemany UPDATE; ids missing from the result were not found.
+    """
+    table = TaskDB.__table__
+    now = utc_now()
+    groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+    for item in items:
+        values = item.model_dump(exclude_unset=True, exclude={"id"})
+        bound = {f"new_{field}": value for field, value in values.items()}
+        groups.setdefault(tuple(sorted(values)), []).append({"task_id": item.id, **bound})
+
+    for fields, params in groups.items():
+        columns: dict[str, Any] = {field: bindparam(f"new_{field}") for field in fields}
+        if "status" in fields:
+            status = bindparam("new_status", type_=table.c.status.type)
+            columns["completed_at"] = _completed_at_on_update(status, now)
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("task_id"))
+            .values(updated_at=now, **columns)
+        )
+        db.execute(stmt, params)
+
+    rows = db.execute(select(table).where(table.c.id.in_([item.id for item in items]))).all()
+    db.commit()
+    return {row.id: row for row in rows}
+
 
-    db_task.updated_at = utc_now()  # type: ignore[assignment]
+def delete_tasks(db: Session, status: TaskStatus) -> list[int]:
+    """Delete every task with `status`, returning the deleted ids."""
+    table = TaskDB.__table__
+    deleted_ids = db.scalars(delete(table).where(table.c.status == status).returning(table.c.id))
+    ids = list(deleted_ids)
     db.commit()
-    db.refresh(db_task)
-    return db_task
+    return ids
+
+
+def get_task_stats(db: Session, since: date) -> tuple[dict[TaskStatus, int], list[Row[Any]]]:
+    """Count tasks per status, and tasks created and completed per day from `since` on.
+
+    On SQLite this reads the summary tables the task triggers maintain, one
+    row per status and per day however many tasks there are. Elsewhere it
+    aggregates the tasks table, which is correct but scans it.
+    """
+    tasks = TaskDB.__table__
+    daily_counts: FromClause
+    if db.get_bind().dialect.name == "sqlite":
+        statuses = select(task_status_counts.c.status, task_status_counts.c.count)
+        daily_counts = task_daily_counts
+    else:
+        statuses = select(tasks.c.status, func.count()).group_by(tasks.c.status)
+        daily_counts = daily_task_counts()
+    by_status = {status: count for status, count in db.execute(statuses)}
+    daily = db.execute(
+        select(daily_counts).where(daily_counts.c.day >= since).order_by(daily_counts.c.day)
+    ).all()
+    return by_status, list(daily)
 
 
-def delete_task(db: Session, task_id: int) -> bool:
-    db_task = get_task(db, task_id)
-    if db_task is None:
-        return False
+def get_user(db: Session, username: str) -> Row[Any] | None:
+    table = UserDB.__table__
+    return db.execute(select(table).where(table.c.username == username)).first()
+
+
+def create_user(db: Session, username: str, hashed_password: str) -> Row[Any]:
+    table = UserDB.__table__
+    row = db.execute(
+        insert(table)
+        .values(username=username, hashed_password=hashed_password, created_at=utc_now())
+        .returning(*table.c)
+    ).one()
+    db.commit()
+    return row
+
 
-    db.delete(db_task)
+def set_user_password(db: Session, user_id: int, hashed_password: str) -> None:
+    table = UserDB.__table__
+    db.execute(update(table).where(table.c.id == user_id).values(hashed_password=hashed_password))
     db.commit()
-    return True
@@ -1,16 +1,258 @@
-from collections.abc import Generator
+import logging
+import time
+from collections.abc import AsyncGenerator, Callable, Generator
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from typing import Any, TypeVar
 
-from sqlalchemy import Column, DateTime, Enum, Integer, String, create_engine
+from sqlalchemy import (
+    Column,
+    Connection,
+    Date,
+    DateTime,
+    Engine,
+    Enum,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+    delete,
+    event,
+    func,
+    insert,
+    literal,
+    make_url,
+    select,
+    type_coerce,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry, QueuePool
+from sqlalchemy.sql import Subquery
 
 from app.config import get_settings
+from app.metrics import DB_POOL_CHECKOUT_SECONDS
 from app.models import TaskStatus
+from app.passwords import hash_password
 
 settings = get_settings()
+sql_logger = logging.getLogger("app.sql")
 
-engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Swap the driver in a sync database URL for its asyncio counterpart."""
+    scheme, separator, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}{separator}{rest}"
+
+
+E = TypeVar("E", Engine, AsyncEngine)
+
+
+def is_sqlite_file(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def sqlite_pragmas(read_only: bool) -> list[str]:
+    pragmas = [
+        f"busy_timeout = {settings.sqlite_busy_timeout_ms}",
+        f"synchronous = {settings.sqlite_synchronous}",
+        f"mmap_size = {settings.sqlite_mmap_size}",
+        f"cache_size = {settings.sqlite_cache_size}",
+        f"temp_store = {settings.sqlite_temp_store}",
+    ]
+    if read_only:
+        pragmas.append("query_only = ON")
+    else:
+        # The journal mode is persistent, so only the writer needs to set it
+        pragmas.insert(0, f"journal_mode = {settings.sqlite_journal_mode}")
+    return pragmas
+
+
+def tune_sqlite(engine: Engine, read_only: bool) -> None:
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection."""
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(self.logging_name).observe(time.perf_counter() - start)
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waits."""
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(self.logging_name).observe(time.perf_counter() - start)
+
+
+@dataclass
+class QueryStats:
+    """Statements run and time spent in the database during one request."""
+
+    count: int = 0
+    seconds: float = 0.0
+    # Executions per statement text, to name the likely culprit of an N+1 query
+    statements: dict[str, int] = field(default_factory=dict)
+
+    def most_repeated(self) -> tuple[str, int]:
+        return max(self.statements.items(), key=lambda item: item[1], default=("", 0))
+
+
+# Set per request by RequestLoggingMiddleware; threadpool calls see a copy of the
+# context that still points at the same QueryStats
+query_stats_var: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> str:
+    """Describe bound parameters by type only, so slow-query logs carry no values."""
+    if executemany:
+        first = parameter_shape(parameters[0]) if parameters else "()"
+        return f"{len(parameters)} x {first}"
+    if isinstance(parameters, dict):
+        return (
+            "{"
+            + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items())
+            + "}"
+        )
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(
+    conn: Connection, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn: Connection, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    elapsed = time.perf_counter() - conn.info.pop("query_started", time.perf_counter())
+    stats = query_stats_var.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        stats.statements[statement] = stats.statements.get(statement, 0) + 1
+    if elapsed * 1000 >= settings.sql_slow_query_ms:
+        shape = parameter_shape(parameters, executemany)
+        sql_logger.warning(
+            "Slow query (%.1fms): %s",
+            elapsed * 1000,
+            " ".join(statement.split()),
+            extra={"duration_ms": round(elapsed * 1000, 3), "parameters": shape},
+        )
+
+
+def instrument_queries(engine: E) -> E:
+    """Time every statement on the engine into the current request's QueryStats."""
+    if settings.sql_stats:
+        target = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+    return engine
+
+
+def build_engine(url: str, factory: Callable[..., E], role: str, read_only: bool = False) -> E:
+    parsed = make_url(url)
+    is_sqlite = parsed.get_backend_name() == "sqlite"
+    options: dict[str, Any] = {}
+    if is_sqlite:
+        options["connect_args"] = {"check_same_thread": False}
+        if not is_sqlite_file(url):
+            # In-memory databases live in SQLAlchemy's single-connection pools
+            return instrument_queries(factory(url, **options))
+
+    async_driver = parsed.get_dialect().is_async
+    options.update(
+        poolclass=TimedAsyncAdaptedQueuePool if async_driver else TimedQueuePool,
+        pool_logging_name=role,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_recycle=settings.db_pool_recycle,
+        pool_timeout=settings.db_pool_timeout,
+    )
+    tuned = is_sqlite and settings.sqlite_tuning
+    if tuned:
+        pool_size = settings.sqlite_reader_pool_size if read_only else 1
+        options.update(pool_size=pool_size, max_overflow=0)
+
+    engine = factory(url, **options)
+    if tuned:
+        tune_sqlite(engine.sync_engine if isinstance(engine, AsyncEngine) else engine, read_only)
+    return instrument_queries(engine)
+
+
+def create_engines(url: str, factory: Callable[..., E], read_url: str | None = None) -> tuple[E, E]:
+    """Build the (writer, reader) engine pair for a database URL.
+
+    Tuned SQLite files get a single-connection writer pool, so writes queue
+    in the process instead of failing with "database is locked", and a
+    separate pool of query-only readers that WAL lets run alongside it.
+    With `read_url` the reader is a replica. Otherwise both roles share
+    one engine.
+    """
+    writer = build_engine(url, factory, "primary")
+    if read_url is not None:
+        return writer, build_engine(read_url, factory, "read", read_only=True)
+    if settings.sqlite_tuning and is_sqlite_file(url):
+        return writer, build_engine(url, factory, "read", read_only=True)
+    return writer, writer
+
+
+engine, read_engine = create_engines(
+    settings.database_url, create_engine, read_url=settings.database_read_url
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+AsyncSessionLocal: async_sessionmaker[AsyncSession] | None = None
+AsyncReadSessionLocal: async_sessionmaker[AsyncSession] | None = None
+if settings.async_database:
+    read_url = settings.database_read_url
+    async_engine, async_read_engine = create_engines(
+        async_database_url(settings.database_url),
+        create_async_engine,
+        read_url=async_database_url(read_url) if read_url else None,
+    )
+    # Nothing may lazy-load after commit: there is no greenlet to run the IO in
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    AsyncReadSessionLocal = async_sessionmaker(
+        async_read_engine, autoflush=False, expire_on_commit=False
+    )
 
 Base = declarative_base()
 
@@ -21,8 +263,12 @@ def utc_now() -> datetime:
 
 class TaskDB(Base):  # type: ignore[valid-type, misc]
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Serves status filters in id order, including keyset pagination
+        Index("ix_tasks_status_id", "status", "id"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     title = Column(String(200), nullable=False)
     description = Column(String, nullable=True)
     status: Column[TaskStatus] = Column(
@@ -30,10 +276,220 @@ class TaskDB(Base):  # type: ignore[valid-type, misc]
     )
     created_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
     updated_at = Column(DateTime(timezone=True), default=utc_now, onupdate=utc_now, nullable=False)
+    # When the task last became completed; null while it is not completed
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class UserDB(Base):  # type: ignore[valid-type, misc]
+    __tablename__ = "users"
+
+    id = Column(Integer, primary_key=True)
+    username = Column(String(100), nullable=False, unique=True)
+    hashed_password = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
+
+
+# Summary counts, one row per status and per UTC day, maintained by the
+# TASK_STATS_DDL triggers. SQLite only, like the search index: nothing keeps
+# them current elsewhere, so they live in their own MetaData and other
+# databases aggregate the tasks table instead.
+stats_metadata = MetaData()
+
+task_status_counts = Table(
+    "task_status_counts",
+    stats_metadata,
+    Column("status", Enum(TaskStatus), primary_key=True),
+    Column("count", Integer, nullable=False, default=0),
+)
+
+# A day's completed counts tasks completed then that are still completed
+task_daily_counts = Table(
+    "task_daily_counts",
+    stats_metadata,
+    Column("day", Date, primary_key=True),
+    Column("created", Integer, nullable=False, default=0),
+    Column("completed", Integer, nullable=False, default=0),
+)
+
+
+def daily_task_counts() -> Subquery:
+    """Tasks created and completed per UTC day, aggregated from the tasks table."""
+    tasks = TaskDB.__table__
+    events = union_all(
+        select(
+            func.date(tasks.c.created_at).label("day"),
+            literal(1).label("created"),
+            literal(0).label("completed"),
+        ),
+        select(func.date(tasks.c.completed_at), literal(0), literal(1)).where(
+            tasks.c.completed_at.is_not(None)
+        ),
+    ).subquery("events")
+    return (
+        select(
+            type_coerce(events.c.day, Date).label("day"),
+            func.sum(events.c.created).label("created"),
+            func.sum(events.c.completed).label("completed"),
+        )
+        .group_by(events.c.day)
+        .subquery("daily")
+    )
+
+
+def rebuild_task_stats(connection: Connection) -> None:
+    """Recount the SQLite summary tables from the tasks table, in the caller's transaction."""
+    tasks = TaskDB.__table__
+    connection.execute(delete(task_status_counts))
+    connection.execute(delete(task_daily_counts))
+    connection.execute(
+        insert(task_status_counts).from_select(
+            ["status", "count"],
+            select(tasks.c.status, func.count()).group_by(tasks.c.status),
+        )
+    )
+    connection.execute(
+        insert(task_daily_counts).from_select(
+            ["day", "created", "completed"], select(daily_task_counts())
+        )
+    )
+
+
+# Keep the summary counts current in the statement that changes the task, so
+# dashboards read one row per status and per day instead of scanning tasks
+TASK_STATS_DDL = (
+    """CREATE TRIGGER IF NOT EXISTS task_stats_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO task_status_counts(status, count) VALUES (new.status, 1)
+            ON CONFLICT(status) DO UPDATE SET count = count + 1;
+        INSERT INTO task_daily_counts(day, created, completed)
+            VALUES (date(new.created_at), 1, 0)
+            ON CONFLICT(day) DO UPDATE SET created = created + 1;
+        INSERT INTO task_daily_counts(day, created, completed)
+            SELECT date(new.completed_at), 0, 1 WHERE new.completed_at IS NOT NULL
+            ON CONFLICT(day) DO UPDATE SET completed = completed + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS task_stats_ad AFTER DELETE ON tasks BEGIN
+        UPDATE task_status_counts SET count = count - 1 WHERE status = old.status;
+        UPDATE task_daily_counts SET created = created - 1 WHERE day = date(old.created_at);
+        UPDATE task_daily_counts SET completed = completed - 1
+            WHERE day = date(old.completed_at);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS task_stats_au_status AFTER UPDATE OF status ON tasks
+    WHEN old.status IS NOT new.status BEGIN
+        UPDATE task_status_counts SET count = count - 1 WHERE status = old.status;
+        INSERT INTO task_status_counts(status, count) VALUES (new.status, 1)
+            ON CONFLICT(status) DO UPDATE SET count = count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS task_stats_au_completed AFTER UPDATE OF completed_at ON tasks
+    WHEN old.completed_at IS NOT new.completed_at BEGIN
+        UPDATE task_daily_counts SET completed = completed - 1
+            WHERE day = date(old.completed_at);
+        INSERT INTO task_daily_counts(day, created, completed)
+            SELECT date(new.completed_at), 0, 1 WHERE new.completed_at IS NOT NULL
+            ON CONFLICT(day) DO UPDATE SET completed = completed + 1;
+    END""",
+)
+
+
+def create_task_stats(connection: Connection) -> None:
+    """Create the SQLite summary tables, if missing, and the triggers that maintain them."""
+    stats_metadata.create_all(bind=connection)
+    for statement in TASK_STATS_DDL:
+        connection.exec_driver_sql(statement)
+
+
+# Full-text index over title and description, kept in sync by triggers.
+# The trigram tokenizer makes MATCH usable for case-insensitive substring
+# search, so `search` no longer needs a LIKE scan over the whole table.
+# It lives in its own MetaData because it is created by the DDL below.
+tasks_fts = Table(
+    "tasks_fts",
+    MetaData(),
+    Column("rowid", Integer, primary_key=True),
+    Column("title", String),
+    Column("description", String),
+    Column("tasks_fts", String),  # hidden column used as the MATCH target
+    Column("rank", String),
+)
+
+TASKS_FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title, description, content='tasks', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks
+    BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+)
+
+
+def create_search_index(connection: Connection) -> None:
+    for statement in TASKS_FTS_DDL:
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(TaskDB.__table__, "after_create")
+def _after_tasks_create(target: Table, connection: Connection, **kw: Any) -> None:
+    if connection.dialect.name == "sqlite":
+        create_search_index(connection)
+
 
+@event.listens_for(Base.metadata, "after_create")
+def _after_create_all(target: MetaData, connection: Connection, **kw: Any) -> None:
+    # The triggers are on tasks, so the summary tables follow the whole schema
+    if connection.dialect.name == "sqlite":
+        create_task_stats(connection)
 
-def create_tables() -> None:
-    Base.metadata.create_all(bind=engine)
+
+@event.listens_for(Base.metadata, "after_drop")
+def _after_drop_all(target: MetaData, connection: Connection, **kw: Any) -> None:
+    if connection.dialect.name == "sqlite":
+        stats_metadata.drop_all(bind=connection)
+
+
+@event.listens_for(TaskDB.__table__, "before_drop")
+def _before_tasks_drop(target: Table, connection: Connection, **kw: Any) -> None:
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS tasks_fts")
+
+
+def seed_demo_user(bind: Engine) -> None:
+    """Create the admin/admin demo user if there are no users yet."""
+    with bind.begin() as conn:
+        if conn.execute(select(UserDB.__table__.c.id).limit(1)).first() is None:
+            conn.execute(
+                insert(UserDB.__table__).values(
+                    username="admin", hashed_password=hash_password("admin"), created_at=utc_now()
+                )
+            )
+
+
+def warm_pool(bind: Engine) -> int:
+    """Open the pool's steady-state connections now instead of on the first requests."""
+    size = bind.pool.size() if isinstance(bind.pool, QueuePool) else 1
+    connections = [bind.connect() for _ in range(size)]
+    for connection in connections:
+        connection.close()
+    return size
+
+
+async def warm_async_pool(bind: AsyncEngine) -> int:
+    pool = bind.sync_engine.pool
+    size = pool.size() if isinstance(pool, QueuePool) else 1
+    connections = [await bind.connect() for _ in range(size)]
+    for connection in connections:
+        await connection.close()
+    return size
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -42,3 +498,33 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Set ASYNC_DATABASE=true to use the async database session")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    if AsyncReadSessionLocal is None:
+        raise RuntimeError("Set ASYNC_DATABASE=true to use the async database session")
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+AnySession = Session | AsyncSession
+
+# Request-scoped session dependencies for the configured driver. Read-only
+# endpoints use the read session so they never queue behind writes.
+get_session = get_async_db if settings.async_database else get_db
+get_read_session = get_async_read_db if settings.async_database else get_read_db
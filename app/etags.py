@@ -0,0 +1,78 @@
+import hashlib
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; every timestamp we store is UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def version(updated_at: datetime) -> int:
+    """Microseconds since the epoch, the finest resolution updated_at keeps."""
+    return (as_utc(updated_at) - EPOCH) // timedelta(microseconds=1)
+
+
+def task_etag(task_id: int, updated_at: datetime) -> str:
+    return f'"{task_id}-{version(updated_at):x}"'
+
+
+def list_etag(tasks: Sequence[Any]) -> str:
+    """Weak validator for a page: row count, newest update and the ids shown."""
+    if not tasks:
+        return 'W/"0"'
+    digest = hashlib.blake2b(digest_size=8)
+    for task in tasks:
+        digest.update(f"{task.id}:{version(task.updated_at)},".encode())
+    newest = max(version(task.updated_at) for task in tasks)
+    return f'W/"{len(tasks)}-{newest:x}-{digest.hexdigest()}"'
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(as_utc(value), usegmt=True)
+
+
+def _tags(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def none_match(header: str | None, etag: str) -> bool:
+    """True if If-None-Match lists `etag` (weak comparison) or is "*"."""
+    if header is None:
+        return False
+    opaque = etag.removeprefix("W/")
+    return any(tag == "*" or tag.removeprefix("W/") == opaque for tag in _tags(header))
+
+
+def not_modified_since(header: str | None, updated_at: datetime) -> bool:
+    if header is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have whole-second resolution
+    return as_utc(updated_at).replace(microsecond=0) <= as_utc(since)
+
+
+def if_match_versions(header: str | None, task_id: int) -> list[datetime] | None:
+    """updated_at values that satisfy an If-Match header for this task.
+
+    None means no precondition ("*" or no header). Weak tags never match,
+    as If-Match requires strong comparison.
+    """
+    if header is None or header.strip() == "*":
+        return None
+    versions = []
+    for tag in _tags(header):
+        tag_id, _, tag_version = tag.strip('"').partition("-")
+        if tag.startswith('"') and tag_id == str(task_id):
+            try:
+                versions.append(EPOCH + timedelta(microseconds=int(tag_version, 16)))
+            except ValueError:
+                continue
+    return versions
@@ -0,0 +1,182 @@
+import csv
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Sequence
+
+from pydantic import TypeAdapter, ValidationError
+
+from app.models import TaskCreate, TaskFileFormat, TaskImportError, TaskImportResult
+
+# A numbered physical line (NDJSON) or logical record (CSV), without its newline
+Record = tuple[int, bytes]
+
+InsertTasks = Callable[[list[TaskCreate]], Awaitable[object]]
+
+_task = TypeAdapter(TaskCreate)
+
+
+async def iter_lines(
+    chunks: AsyncIterable[bytes], max_length: int = 1 << 20
+) -> AsyncIterator[list[Record]]:
+    """Split a byte stream into numbered lines, one list per chunk received.
+
+    Only the trailing partial line is carried between chunks, so memory is
+    bounded by the chunk and `max_length` rather than the whole body. A
+    longer line is cut to `max_length + 1` bytes, which callers reject.
+    """
+    partial: list[bytes] = []
+    kept = 0
+    lineno = 0
+    async for chunk in chunks:
+        *complete, rest = chunk.split(b"\n")
+        lines = []
+        for line in complete:
+            if partial:
+                line = b"".join([*partial, line])
+                partial, kept = [], 0
+            lineno += 1
+            lines.append((lineno, line[: max_length + 1].rstrip(b"\r")))
+        if rest and kept <= max_length:
+            partial.append(rest[: max_length + 1 - kept])
+            kept += len(partial[-1])
+        if lines:
+            yield lines
+    if partial:
+        yield [(lineno + 1, b"".join(partial).rstrip(b"\r"))]
+
+
+async def iter_csv_records(
+    chunks: AsyncIterable[bytes], max_length: int = 1 << 20
+) -> AsyncIterator[list[Record]]:
+    """Join physical lines into CSV records, keeping quoted newlines inside fields.
+
+    A record is complete when it holds an even number of quote characters;
+    escaped quotes ("") come in pairs and do not change the parity. Past
+    `max_length` bytes the end of the record cannot be trusted, so the
+    import stops with a ValueError.
+    """
+    start, pending = 0, b""
+    async for lines in iter_lines(chunks, max_length):
+        records = []
+        for lineno, line in lines:
+            if pending:
+                pending += b"\n" + line
+            else:
+                start, pending = lineno, line
+            if len(pending) > max_length:
+                raise ValueError(f"CSV record at line {start} is longer than {max_length} bytes")
+            if pending.count(b'"') % 2 == 0:
+                records.append((start, pending))
+                pending = b""
+        if records:
+            yield records
+    if pending:
+        yield [(start, pending)]
+
+
+def _describe(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, error['loc']))}: {error['msg']}" if error["loc"] else error["msg"]
+        for error in exc.errors(include_url=False)
+    )
+
+
+class TaskImporter:
+    """Validate records in chunks and hand each chunk of valid tasks to `insert`.
+
+    `insert` is None for a dry run. Invalid records are skipped and counted;
+    the first `max_errors` of them are reported with their line numbers.
+    """
+
+    def __init__(
+        self,
+        fmt: TaskFileFormat,
+        insert: InsertTasks | None,
+        chunk_size: int,
+        max_errors: int,
+        max_line_bytes: int = 1 << 20,
+    ) -> None:
+        self.fmt = fmt
+        self.insert = insert
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.max_line_bytes = max_line_bytes
+        self.columns: list[str] | None = None
+        self.result = TaskImportResult(dry_run=insert is None)
+
+    async def run(self, chunks: AsyncIterable[bytes]) -> TaskImportResult:
+        records = (
+            iter_lines(chunks, self.max_line_bytes)
+            if self.fmt is TaskFileFormat.ndjson
+            else iter_csv_records(chunks, self.max_line_bytes)
+        )
+        batch: list[Record] = []
+        async for received in records:
+            for record in received:
+                if not record[1].strip():
+                    continue
+                if self.fmt is TaskFileFormat.csv and self.columns is None:
+                    self.columns = self._header(record[1])
+                    continue
+                batch.append(record)
+                if len(batch) >= self.chunk_size:
+                    await self._flush(batch)
+                    batch = []
+        if batch:
+            await self._flush(batch)
+        return self.result
+
+    def _header(self, line: bytes) -> list[str]:
+        columns = next(csv.reader([line.decode("utf-8-sig")]))
+        if "title" not in columns:
+            raise ValueError("CSV header must include a title column")
+        return columns
+
+    async def _flush(self, batch: list[Record]) -> None:
+        tasks = self._validate(batch)
+        if tasks and self.insert is not None:
+            await self.insert(tasks)
+        self.result.imported += len(tasks)
+
+    def _validate(self, batch: list[Record]) -> list[TaskCreate]:
+        if self.fmt is TaskFileFormat.ndjson:
+            # Each line on its own: a chunk joined into one array would accept an
+            # object split across two lines, or two objects on one
+            return self._each(batch, self._parse_ndjson)
+        return self._each(batch, self._parse_csv)
+
+    def _parse_ndjson(self, line: bytes) -> TaskCreate:
+        if len(line) > self.max_line_bytes:
+            raise ValueError(f"Line is longer than {self.max_line_bytes} bytes")
+        return _task.validate_json(line)
+
+    def _parse_csv(self, line: bytes) -> TaskCreate:
+        assert self.columns is not None
+        fields = next(csv.reader([line.decode()]))
+        if len(fields) != len(self.columns):
+            raise ValueError(f"Expected {len(self.columns)} fields, got {len(fields)}")
+        # Empty cells fall back to the field default, so exported CSV round-trips
+        return _task.validate_python(
+            {
+                column: value
+                for column, value in zip(self.columns, fields, strict=True)
+                if value != ""
+            }
+        )
+
+    def _each(
+        self, batch: Sequence[Record], parse: Callable[[bytes], TaskCreate]
+    ) -> list[TaskCreate]:
+        tasks = []
+        for lineno, line in batch:
+            try:
+                tasks.append(parse(line))
+            except ValidationError as exc:
+                self._error(lineno, _describe(exc))
+            # Undecodable bytes, malformed quoting or a wrong number of fields
+            except (ValueError, csv.Error) as exc:
+                self._error(lineno, str(exc))
+        return tasks
+
+    def _error(self, lineno: int, detail: str) -> None:
+        self.result.failed += 1
+        if len(self.result.errors) < self.max_errors:
+            self.result.errors.append(TaskImportError(line=lineno, detail=detail))
@@ -1,12 +1,22 @@
+import atexit
+import copy
 import logging
+import queue
+import random
 import sys
 import uuid
 from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import TextIO
 
 from pythonjsonlogger import jsonlogger
 
+from app.metrics import LOG_RECORDS_DROPPED
+
 request_id_var: ContextVar[str] = ContextVar("request_id", default="")
 
+_listener: QueueListener | None = None
+
 
 class RequestIdFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> bool:
@@ -14,22 +24,112 @@ class RequestIdFilter(logging.Filter):
         return True
 
 
-def setup_logging(debug: bool = False) -> logging.Logger:
+class AccessLogSampler(logging.Filter):
+    """Keep a random `rate` of successful access lines and every error."""
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "status_code", 500) >= 400 or self.rate >= 1:
+            return True
+        return random.random() < self.rate  # nosec B311 - sampling, not security
+
+
+class StdoutHandler(logging.StreamHandler):  # type: ignore[type-arg]
+    """Write to whatever sys.stdout is when a record is emitted.
+
+    A stream bound at setup goes stale once something swaps stdout, and
+    writing to it after a test runner closes it fails on every record.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self) -> TextIO:
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value: TextIO) -> None:
+        pass
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Enqueue without blocking; count and discard records when the queue is full."""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge the args now, as they may change after the call returns.
+        # Unlike the default this leaves exc_info for the JSON formatter.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def stop_log_listener() -> None:
+    """Flush queued records and stop the background logging thread, if running.
+
+    The root logger's queue handler is swapped back for the handlers the
+    thread wrote to, so anything logged afterwards is written directly
+    instead of queueing where nothing reads it.
+    """
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    root = logging.getLogger()
+    for queue_handler in [h for h in root.handlers if isinstance(h, DroppingQueueHandler)]:
+        if queue_handler.queue is listener.queue:
+            root.removeHandler(queue_handler)
+            for handler in listener.handlers:
+                handler.addFilter(RequestIdFilter())
+                root.addHandler(handler)
+
+
+def setup_logging(
+    debug: bool = False, queue_size: int = 0, access_log_sample_rate: float = 1.0
+) -> logging.Logger:
+    global _listener
     logger = logging.getLogger()
     logger.setLevel(logging.DEBUG if debug else logging.INFO)
 
-    handler = logging.StreamHandler(sys.stdout)
+    stream_handler = StdoutHandler()
     formatter = jsonlogger.JsonFormatter(
         "%(asctime)s %(levelname)s %(name)s %(message)s %(request_id)s"
     )
-    handler.setFormatter(formatter)
+    stream_handler.setFormatter(formatter)
+
+    handler: logging.Handler = stream_handler
+    stop_log_listener()
+    if queue_size > 0:
+        # JSON formatting and the stdout write happen on the listener's thread
+        log_queue: queue.Queue[logging.LogRecord] = queue.Queue(queue_size)
+        _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        handler = DroppingQueueHandler(log_queue)
+    # The request id lives in a contextvar, so read it before the record is queued
     handler.addFilter(RequestIdFilter())
 
     logger.handlers = []
     logger.addHandler(handler)
 
+    access_logger = logging.getLogger("app.access")
+    access_logger.filters = [AccessLogSampler(access_log_sample_rate)]
+
     return logger
 
 
+atexit.register(stop_log_listener)
+
+
 def generate_request_id() -> str:
     return str(uuid.uuid4())[:8]
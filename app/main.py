@@ -1,36 +1,102 @@
 import logging
-from collections.abc import Callable
-from typing import Any
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
-from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from anyio import to_thread
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from prometheus_fastapi_instrumentator import Instrumentator
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from app import IMPORT_STARTED, crud, database, passwords, profiling
 from app.config import get_settings
-from app.database import create_tables, get_db
-from app.logging_config import generate_request_id, request_id_var, setup_logging
+from app.database import AnySession, get_read_session, warm_async_pool, warm_pool
+from app.logging_config import setup_logging, stop_log_listener
+from app.middleware import RateLimitMiddleware, RequestLoggingMiddleware
 from app.rate_limit import limiter
-from app.routers import v1
+from app.routers import debug, v1
 
 settings = get_settings()
-setup_logging(settings.debug)
+setup_logging(
+    settings.debug,
+    queue_size=settings.log_queue_size,
+    access_log_sample_rate=settings.access_log_sample_rate,
+)
 logger = logging.getLogger(__name__)
 
+
+def warm_pools() -> int:
+    return sum(warm_pool(bind) for bind in {database.engine, database.read_engine})
+
+
+async def warm_async_pools() -> int:
+    binds = {database.async_engine, database.async_read_engine}
+    return sum([await warm_async_pool(bind) for bind in binds])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Prepare the database and pools, logging how long each startup phase took."""
+    phases = {"import": time.perf_counter() - IMPORT_STARTED}
+    started = time.perf_counter()
+
+    def phase_done(name: str) -> None:
+        nonlocal started
+        now = time.perf_counter()
+        phases[name] = now - started
+        started = now
+
+    to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_size
+    if settings.migrate_on_startup:
+        # Alembic takes a few hundred ms to import, so only pay for it when migrating
+        from app.migrations import migrate
+
+        await to_thread.run_sync(migrate, database.engine)
+        phase_done("migrate")
+    if settings.async_database:
+        connections = await warm_async_pools()
+    else:
+        connections = await to_thread.run_sync(warm_pools)
+    phase_done("warm_pools")
+    if settings.profile_slow_percent > 0:
+        profiling.start_slow_request_profiler(
+            settings.profile_slow_percent,
+            settings.profile_interval_ms / 1000,
+            settings.profile_dir,
+            settings.profile_keep,
+        )
+    logger.info(
+        "Startup complete in %.0fms (%s), %d connections open",
+        sum(phases.values()) * 1000,
+        ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in phases.items()),
+        connections,
+        extra={"startup_ms": {name: round(s * 1000, 1) for name, s in phases.items()}},
+    )
+    try:
+        yield
+    finally:
+        profiling.stop_slow_request_profiler()
+        passwords.shutdown_password_pool()
+        for bind in {database.engine, database.read_engine}:
+            bind.dispose()
+        if settings.async_database:
+            for async_bind in {database.async_engine, database.async_read_engine}:
+                await async_bind.dispose()
+        stop_log_listener()
+
+
 app = FastAPI(
     title="Task API",
     description="A RESTful API for task management",
     version="1.0.0",
+    lifespan=lifespan,
 )
-app.state.limiter = limiter
-app.add_exception_handler(
-    RateLimitExceeded,
-    _rate_limit_exceeded_handler,  # type: ignore[arg-type]
-)
+
+# Innermost, so rejected requests still pass through CORS and show up in the metrics
+app.add_middleware(RateLimitMiddleware, limiter=limiter, routes=v1.router.routes)
 
 # Prometheus metrics
 Instrumentator().instrument(app).expose(app, endpoint="/metrics", tags=["system"])
@@ -52,27 +118,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "ETag",
+        "X-Next-Cursor",
+        "X-Request-ID",
+        "X-Total-Count",
+        "X-Total-Count-Accuracy",
+    ],
 )
 
-create_tables()
+# Outermost, so the access line covers CORS and the metrics middleware too
+app.add_middleware(RequestLoggingMiddleware)
 
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next: Callable[[Request], Any]) -> Response:
-    request_id = generate_request_id()
-    request_id_var.set(request_id)
-    logger.info(f"Request started: {request.method} {request.url.path}")
-    response: Response = await call_next(request)
-    response.headers["X-Request-ID"] = request_id
-    logger.info(f"Request completed: {request.method} {request.url.path} - {response.status_code}")
-    return response
+def ping_database(db: Session) -> None:
+    db.execute(text("SELECT 1"))
 
 
 @app.get("/health", tags=["system"])
-def health_check(db: Session = Depends(get_db)) -> dict[str, str]:
+async def health_check(db: AnySession = Depends(get_read_session)) -> dict[str, str]:
     """Check API and database health status."""
     try:
-        db.execute(text("SELECT 1"))
+        await crud.run(db, ping_database)
         return {"status": "healthy", "database": "connected"}
     except Exception:
         raise HTTPException(status_code=503, detail="Database unavailable") from None
@@ -80,3 +147,4 @@ def health_check(db: Session = Depends(get_db)) -> dict[str, str]:
 
 # Include versioned API router
 app.include_router(v1.router)
+app.include_router(debug.router)
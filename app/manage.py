@@ -0,0 +1,74 @@
+"""Administrative commands.
+
+python -m app.manage create-user USERNAME [--password-stdin]
+python -m app.manage rebuild-stats
+"""
+
+import argparse
+import getpass
+import sys
+
+from sqlalchemy.exc import IntegrityError
+
+from app import crud
+from app.database import SessionLocal, engine, rebuild_task_stats
+from app.migrations import migrate
+from app.passwords import hash_password
+
+
+def create_user(args: argparse.Namespace) -> int:
+    if args.password_stdin:
+        password = sys.stdin.readline().rstrip("\n")
+    else:
+        password = getpass.getpass("Password: ")
+        if password != getpass.getpass("Repeat password: "):
+            print("Passwords do not match", file=sys.stderr)
+            return 1
+    if not password:
+        print("Password must not be empty", file=sys.stderr)
+        return 1
+    migrate(engine)
+    with SessionLocal() as db:
+        try:
+            crud.create_user(db, args.username, hash_password(password))
+        except IntegrityError:
+            print(f"User {args.username!r} already exists", file=sys.stderr)
+            return 1
+    print(f"Created user {args.username!r}")
+    return 0
+
+
+def rebuild_stats(args: argparse.Namespace) -> int:
+    migrate(engine)
+    if engine.dialect.name != "sqlite":
+        print("Task statistics are counted from the tasks table on this database")
+        return 0
+    with engine.begin() as connection:
+        rebuild_task_stats(connection)
+    print("Rebuilt task statistics")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.manage")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create-user", help="Add a user who can log in")
+    create.add_argument("username")
+    create.add_argument(
+        "--password-stdin", action="store_true", help="Read the password from stdin"
+    )
+    create.set_defaults(handler=create_user)
+
+    rebuild = commands.add_parser(
+        "rebuild-stats", help="Recount the task statistics from the tasks table"
+    )
+    rebuild.set_defaults(handler=rebuild_stats)
+
+    args = parser.parse_args(argv)
+    result: int = args.handler(args)
+    return result
+
+
+if __name__ == "__main__":
+    sys.exit(main())
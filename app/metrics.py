@@ -0,0 +1,44 @@
+from prometheus_client import Counter, Histogram
+
+# Application metrics, exposed on /metrics alongside the HTTP instrumentation
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting to check a connection out of the database pool",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+JWT_VERIFY_SECONDS = Histogram(
+    "jwt_verify_seconds",
+    "Time spent decoding and verifying access tokens missing from the token cache",
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL statements run while handling one request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+
+DB_TIME_PER_REQUEST_SECONDS = Histogram(
+    "db_time_per_request_seconds",
+    "Time spent executing SQL statements while handling one request",
+    ["route"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+CACHE_HITS = Counter("cache_hits", "In-process cache lookups that found an entry", ["cache"])
+CACHE_MISSES = Counter("cache_misses", "In-process cache lookups that found nothing", ["cache"])
+CACHE_EVICTIONS = Counter(
+    "cache_evictions", "Entries dropped from an in-process cache to stay within size", ["cache"]
+)
+
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped", "Log records discarded because the logging queue was full"
+)
+
+RATE_LIMITED = Counter(
+    "rate_limited_requests", "Requests rejected with 429 by the rate limiter", ["route"]
+)
@@ -0,0 +1,180 @@
+import logging
+import re
+import time
+from collections.abc import Sequence
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import profiling
+from app.config import get_settings
+from app.database import QueryStats, query_stats_var
+from app.logging_config import generate_request_id, request_id_var
+from app.metrics import DB_QUERIES_PER_REQUEST, DB_TIME_PER_REQUEST_SECONDS, RATE_LIMITED
+from app.rate_limit import Limiter, Rate, retry_after
+
+settings = get_settings()
+logger = logging.getLogger("app.access")
+
+# Incoming ids end up in logs and response headers, so only accept plain tokens
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+# Distinct (method, path) pairs RateLimitMiddleware remembers the route of
+RESOLVED_PATHS_MAX = 10000
+
+
+def route_label(scope: Scope) -> str:
+    """The matched route's path template, or the endpoint name where routing records no route."""
+    route = scope.get("route")
+    if route is not None:
+        return str(route.path)
+    endpoint = scope.get("endpoint")
+    return getattr(endpoint, "__name__", "unmatched")
+
+
+class RequestLoggingMiddleware:
+    """Tag each request with an id, echo it as X-Request-ID and log one access line.
+
+    A plain ASGI middleware: `send` is wrapped to add the header to the
+    response start message, so bodies (including streams) pass straight
+    through without the extra task and buffering of BaseHTTPMiddleware.
+    The line also carries the SQL statements and database time of the request,
+    and the duration goes to the slow-request profiler when it is running.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = ""
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        if not REQUEST_ID_PATTERN.fullmatch(request_id):
+            request_id = generate_request_id()
+        token = request_id_var.set(request_id)
+        stats = QueryStats()
+        stats_token = query_stats_var.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("X-Request-ID", request_id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            duration = time.perf_counter() - start
+            duration_ms = duration * 1000
+            route = route_label(scope)
+            if profiling.slow_requests is not None:
+                profiling.slow_requests.finished(start, duration, route, request_id)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.count)
+            DB_TIME_PER_REQUEST_SECONDS.labels(route).observe(stats.seconds)
+            if stats.count > settings.sql_statements_warn:
+                statement, repeats = stats.most_repeated()
+                logger.warning(
+                    "%s ran %d SQL statements, %d of them: %s",
+                    route,
+                    stats.count,
+                    repeats,
+                    " ".join(statement.split()),
+                    extra={"route": route, "db_queries": stats.count},
+                )
+            logger.info(
+                "%s %s %d %.1fms",
+                scope["method"],
+                scope["path"],
+                status_code,
+                duration_ms,
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status_code": status_code,
+                    "duration_ms": round(duration_ms, 3),
+                    "db_queries": stats.count,
+                    "db_time_ms": round(stats.seconds * 1000, 3),
+                },
+            )
+            query_stats_var.reset(stats_token)
+            request_id_var.reset(token)
+
+
+class RateLimitMiddleware:
+    """Enforce the rates declared with `@limiter.limit` before routing.
+
+    `routes` are matched against the request path as is, so they must be
+    the routes of a router included at the root of the app. The limited
+    ones are picked out on the first request, once every route is added,
+    and each method and path is matched against them only once.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: Limiter, routes: Sequence[BaseRoute]) -> None:
+        self.app = app
+        self.limiter = limiter
+        self.routes = routes
+        self.limited: list[tuple[BaseRoute, str, str, Rate]] | None = None
+        self.resolved: dict[tuple[str, str], tuple[str, str, Rate] | None] = {}
+
+    def _limited_routes(self) -> list[tuple[BaseRoute, str, str, Rate]]:
+        """(route, path template, endpoint name, rate) for every limited route."""
+        if self.limited is None:
+            self.limited = [
+                (
+                    route,
+                    getattr(route, "path", ""),
+                    f"{endpoint.__module__}.{endpoint.__qualname__}",
+                    self.limiter.rates[endpoint],
+                )
+                for route in self.routes
+                if (endpoint := getattr(route, "endpoint", None)) in self.limiter.rates
+            ]
+        return self.limited
+
+    def _resolve(self, scope: Scope) -> tuple[str, str, Rate] | None:
+        """The limited route's path, endpoint and rate for this request, or None."""
+        key = (scope["method"], scope["path"])
+        if key not in self.resolved:
+            # Paths carry ids, so start over rather than grow without bound
+            if len(self.resolved) >= RESOLVED_PATHS_MAX:
+                self.resolved.clear()
+            self.resolved[key] = next(
+                (
+                    (path, name, rate)
+                    for route, path, name, rate in self._limited_routes()
+                    if route.matches(scope)[0] is Match.FULL
+                ),
+                None,
+            )
+        return self.resolved[key]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and (limited := self._resolve(scope)) is not None:
+            path, name, rate = limited
+            client = scope["client"][0] if scope.get("client") else "127.0.0.1"
+            # One bucket per endpoint, so the methods sharing a path are limited apart
+            wait = await self.limiter.hit(f"{name}|{client}", rate)
+            if wait > 0:
+                RATE_LIMITED.labels(path).inc()
+                response = JSONResponse(
+                    status_code=429,
+                    content={
+                        "error": "rate_limit_exceeded",
+                        "detail": f"Rate limit exceeded: {rate.text}",
+                    },
+                    headers={"Retry-After": retry_after(wait)},
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
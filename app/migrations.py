@@ -0,0 +1,81 @@
+import logging
+from pathlib import Path
+
+from alembic.command import stamp, upgrade
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import Connection, Engine, inspect
+
+from app.config import get_settings
+from app.database import (
+    Base,
+    TaskDB,
+    create_search_index,
+    create_task_stats,
+    rebuild_task_stats,
+    seed_demo_user,
+)
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+
+def alembic_config(connection: Connection) -> Config:
+    """Alembic config that runs on `connection` and leaves logging alone."""
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["connection"] = connection
+    return config
+
+
+def adopt_unversioned(connection: Connection) -> None:
+    """Bring a database made by create_all, before migrations ran at startup, up to date."""
+    Base.metadata.create_all(bind=connection)
+    # Old create_all made this redundant index; revision a3f09b6e27c4 drops it
+    connection.exec_driver_sql("DROP INDEX IF EXISTS ix_tasks_id")
+    for index in TaskDB.__table__.indexes:
+        index.create(bind=connection, checkfirst=True)
+    columns = {column["name"] for column in inspect(connection).get_columns("tasks")}
+    if "completed_at" not in columns:
+        column_type = TaskDB.__table__.c.completed_at.type.compile(dialect=connection.dialect)
+        connection.exec_driver_sql(f"ALTER TABLE tasks ADD COLUMN completed_at {column_type}")
+        connection.exec_driver_sql(
+            "UPDATE tasks SET completed_at = updated_at WHERE status = 'completed'"
+        )
+    if connection.dialect.name == "sqlite" and not inspect(connection).has_table("tasks_fts"):
+        create_search_index(connection)
+        connection.exec_driver_sql("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+    if connection.dialect.name == "sqlite":
+        create_task_stats(connection)
+        rebuild_task_stats(connection)
+
+
+def upgrade_schema(bind: Engine) -> str:
+    """Migrate the database to the Alembic head; return "current", "upgraded" or "adopted".
+
+    A database already at head costs one read of alembic_version.
+    """
+    with bind.begin() as connection:
+        config = alembic_config(connection)
+        head = ScriptDirectory.from_config(config).get_current_head()
+        current = MigrationContext.configure(connection).get_current_revision()
+        if current == head:
+            return "current"
+        if current is None and inspect(connection).has_table("tasks"):
+            adopt_unversioned(connection)
+            stamp(config, "head")
+            return "adopted"
+        upgrade(config, "head")
+        return "upgraded"
+
+
+def migrate(bind: Engine) -> str:
+    """Upgrade the schema, then seed the demo user if enabled."""
+    outcome = upgrade_schema(bind)
+    if outcome != "current":
+        logger.info("Database schema %s", outcome)
+    if settings.seed_demo_user:
+        seed_demo_user(bind)
+    return outcome
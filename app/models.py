@@ -1,7 +1,8 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
+from typing import Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 class TaskStatus(str, Enum):
@@ -10,6 +11,26 @@ class TaskStatus(str, Enum):
     completed = "completed"
 
 
+class SearchMode(str, Enum):
+    title_only = "title"
+    fulltext = "fulltext"
+
+
+class TaskFileFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class ProfileFormat(str, Enum):
+    collapsed = "collapsed"
+    speedscope = "speedscope"
+
+
+class ProfileMode(str, Enum):
+    wall = "wall"
+    cpu = "cpu"
+
+
 class TaskCreate(BaseModel):
     title: str = Field(..., max_length=200)
     description: str | None = None
@@ -31,3 +52,49 @@ class TaskResponse(BaseModel):
     updated_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class TaskBatchUpdate(TaskUpdate):
+    id: int
+
+    @field_validator("title", "status")
+    @classmethod
+    def not_null(cls, value: object) -> object:
+        # Omit a field to leave it unchanged; the columns are NOT NULL
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
+
+class TaskBatchResult(BaseModel):
+    id: int
+    result: Literal["updated", "not_found"]
+    task: TaskResponse | None = None
+
+
+class TaskBulkDeleteResponse(BaseModel):
+    deleted: int
+
+
+class TaskDailyStats(BaseModel):
+    day: date
+    created: int
+    completed: int
+
+
+class TaskStats(BaseModel):
+    total: int
+    by_status: dict[TaskStatus, int]
+    daily: list[TaskDailyStats]
+
+
+class TaskImportError(BaseModel):
+    line: int
+    detail: str
+
+
+class TaskImportResult(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    dry_run: bool = False
+    errors: list[TaskImportError] = []
@@ -0,0 +1,22 @@
+import base64
+import binascii
+
+# Largest id a signed 64-bit INTEGER column can hold
+MAX_ID = 2**63 - 1
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the id of the last row on a page as an opaque cursor."""
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor produced by encode_cursor, raising ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    except binascii.Error as exc:
+        raise ValueError("Invalid cursor") from exc
+    # bytes.isdigit is ASCII-only, so signs, spaces and underscores are rejected
+    if not raw.isdigit() or len(raw) > len(str(MAX_ID)) or int(raw) > MAX_ID:
+        raise ValueError("Invalid cursor")
+    return int(raw)
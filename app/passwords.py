@@ -0,0 +1,108 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+
+settings = get_settings()
+
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+_pool: ProcessPoolExecutor | None = None
+_dummy_hash: str | None = None
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    # scrypt needs about 128 * r * (n + p) bytes; allow that plus headroom
+    maxmem = 128 * r * (n + p + 2) + 1024 * 1024
+    return hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p, maxmem=maxmem, dklen=KEY_BYTES
+    )
+
+
+def scrypt_cost() -> tuple[int, int, int]:
+    return settings.password_scrypt_n, settings.password_scrypt_r, settings.password_scrypt_p
+
+
+def hash_password(password: str, cost: tuple[int, int, int] | None = None) -> str:
+    """Hash with a fresh salt as "scrypt$n$r$p$salt$key", by default at the configured cost."""
+    n, r, p = cost or scrypt_cost()
+    salt = os.urandom(SALT_BYTES)
+    return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(_scrypt(password, salt, n, r, p))}"
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    """Check a password against a hash made by hash_password, with any cost parameters."""
+    try:
+        scheme, n, r, p, salt, key = hashed.split("$")
+        if scheme != "scrypt":
+            return False
+        expected = _unb64(key)
+        actual = _scrypt(password, _unb64(salt), int(n), int(r), int(p))
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+def needs_rehash(hashed: str) -> bool:
+    """True if the hash was made with cost parameters other than the configured ones."""
+    return hashed.split("$")[1:4] != [str(value) for value in scrypt_cost()]
+
+
+def _executor() -> Executor | None:
+    global _pool
+    if _pool is None and settings.password_hash_workers > 0:
+        # spawn, not fork: the parent has threads (logging, pools) that fork would copy badly
+        _pool = ProcessPoolExecutor(
+            settings.password_hash_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+async def hash_password_async(password: str) -> str:
+    # The cost is passed along so workers never hash with settings of their own
+    cost = scrypt_cost()
+    executor = _executor()
+    if executor is None:
+        return await run_in_threadpool(hash_password, password, cost)
+    return await asyncio.get_running_loop().run_in_executor(executor, hash_password, password, cost)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    """Verify in the password worker processes, keeping the CPU cost off the request workers."""
+    executor = _executor()
+    if executor is None:
+        return await run_in_threadpool(verify_password, password, hashed)
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, verify_password, password, hashed
+    )
+
+
+async def dummy_hash() -> str:
+    """A hash to verify against for unknown users, so they take as long as known ones."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await hash_password_async(_b64(os.urandom(SALT_BYTES)))
+    return _dummy_hash
+
+
+def shutdown_password_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
@@ -0,0 +1,271 @@
+import asyncio
+import itertools
+import json
+import logging
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, deque
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# (name, file, first line) of a function; a stack lists them outermost first
+Frame = tuple[str, str, int]
+Stack = tuple[Frame, ...]
+
+_profile_lock = threading.Lock()
+slow_requests: "SlowRequestProfiler | None" = None
+
+
+def _stack(frame: FrameType | None, thread_name: str) -> Stack:
+    frames: list[Frame] = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", "?")
+        frames.append((f"{module}:{code.co_name}", code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    frames.append((f"thread:{thread_name}", "", 0))
+    return tuple(reversed(frames))
+
+
+def _cpu_ticks(native_id: int) -> int | None:
+    """User plus system CPU time of a thread in clock ticks (Linux only)."""
+    try:
+        with open(f"/proc/self/task/{native_id}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return int(fields[11]) + int(fields[12])
+
+
+class Sampler(threading.Thread, ABC):
+    """Record the stack of every other thread each `interval` seconds until stopped.
+
+    Subclasses decide what to do with each stack in `record`. With
+    `cpu_only`, a thread is recorded only if it used CPU since the previous
+    sample, which turns a wall-clock profile into a CPU one. The kernel
+    counts CPU time in ticks, so short bursts may be missed.
+    """
+
+    def __init__(self, interval: float, cpu_only: bool = False) -> None:
+        super().__init__(name="profiler", daemon=True)
+        if cpu_only and not sys.platform.startswith("linux"):
+            raise ValueError("CPU profiles need /proc (Linux)")
+        self.interval = interval
+        self.cpu_only = cpu_only
+        self.stopping = threading.Event()
+        self._ticks: dict[int, int] = {}
+
+    @abstractmethod
+    def record(self, at: float, stack: Stack) -> None:
+        """Called with each sampled stack, on the sampler thread."""
+
+    def tick(self) -> None:
+        """Called after each round of samples, on the sampler thread."""
+
+    def _busy(self, thread: threading.Thread | None) -> bool:
+        if thread is None or thread.native_id is None:
+            return True
+        ticks = _cpu_ticks(thread.native_id)
+        if ticks is None:
+            return True
+        previous = self._ticks.get(thread.native_id, ticks)
+        self._ticks[thread.native_id] = ticks
+        return ticks > previous
+
+    def run(self) -> None:
+        # A thread whose innermost frame is unchanged (parked in a pool, say) has
+        # the same stack as last time, so it is reused instead of walked again
+        previous: dict[int, tuple[FrameType, Stack]] = {}
+        while not self.stopping.wait(self.interval):
+            now = time.perf_counter()
+            threads = {thread.ident: thread for thread in threading.enumerate()}
+            current: dict[int, tuple[FrameType, Stack]] = {}
+            for ident, frame in sys._current_frames().items():
+                if ident == self.ident:
+                    continue
+                thread = threads.get(ident)
+                if self.cpu_only and not self._busy(thread):
+                    continue
+                seen = previous.get(ident)
+                if seen is not None and seen[0] is frame:
+                    stack = seen[1]
+                else:
+                    stack = _stack(frame, thread.name if thread else str(ident))
+                current[ident] = (frame, stack)
+                self.record(now, stack)
+            previous = current
+            self.tick()
+
+    def stop(self) -> None:
+        self.stopping.set()
+        self.join()
+
+
+class Profile:
+    """Aggregated stack samples, exportable as collapsed stacks or speedscope JSON."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.duration = 0.0
+        self.counts: Counter[Stack] = Counter()
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format, one "frame;frame;frame count" line per stack."""
+        return "".join(
+            ";".join(name for name, _, _ in stack) + f" {count}\n"
+            for stack, count in self.counts.most_common()
+        )
+
+    def speedscope(self, name: str) -> dict[str, Any]:
+        index: dict[Frame, int] = {}
+        samples = []
+        for stack in self.counts:
+            samples.append([index.setdefault(frame, len(index)) for frame in stack])
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "exporter": "task-api",
+            "name": name,
+            "shared": {
+                "frames": [{"name": n, "file": file, "line": line} for n, file, line in index]
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": self.duration,
+                    "samples": samples,
+                    "weights": [count * self.interval for count in self.counts.values()],
+                }
+            ],
+        }
+
+
+class _ProfileSampler(Sampler):
+    def __init__(self, profile: Profile, cpu_only: bool) -> None:
+        super().__init__(profile.interval, cpu_only)
+        self.profile = profile
+
+    def record(self, at: float, stack: Stack) -> None:
+        self.profile.counts[stack] += 1
+
+
+async def profile(seconds: float, interval: float, cpu_only: bool = False) -> Profile:
+    """Sample the whole process for `seconds`; one profile may run at a time.
+
+    Raises RuntimeError if a profile is already running. No thread exists
+    outside a profile, so there is no cost when idle.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise RuntimeError("A profile is already running")
+    try:
+        result = Profile(interval)
+        sampler = _ProfileSampler(result, cpu_only)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await asyncio.to_thread(sampler.stop)
+        result.duration = time.perf_counter() - started
+        return result
+    finally:
+        _profile_lock.release()
+
+
+class SlowRequestProfiler(Sampler):
+    """Sample continuously and save a profile of each of the slowest `percent`% of requests.
+
+    Samples of every thread from the last `window` seconds are kept in a
+    ring. When a finished request is slower than the running percentile,
+    the samples taken during it are written to `directory` as speedscope
+    JSON named after its request id. The profile is of the whole process
+    while the request ran, so it includes whatever else the worker was
+    doing at the time.
+    """
+
+    # Percentile threshold from this many recent durations, refreshed every REFRESH
+    WINDOW_REQUESTS = 1000
+    REFRESH = 100
+    MIN_SECONDS_BETWEEN_PROFILES = 1.0
+
+    def __init__(
+        self, percent: float, interval: float, directory: str, keep: int, window: float = 10.0
+    ) -> None:
+        super().__init__(interval)
+        self.percent = percent
+        self.directory = Path(directory)
+        self.keep = keep
+        # Room for `window` seconds of samples from up to 32 threads
+        self.samples: deque[tuple[float, Stack]] = deque(maxlen=int(window / interval) * 32)
+        self.durations: deque[float] = deque(maxlen=self.WINDOW_REQUESTS)
+        self.threshold = float("inf")
+        self.pending: deque[tuple[float, float, str, str]] = deque(maxlen=100)
+        self.last_saved = 0.0
+        self._finished = itertools.count(1)
+
+    def record(self, at: float, stack: Stack) -> None:
+        self.samples.append((at, stack))
+
+    def finished(self, started: float, duration: float, route: str, request_id: str) -> None:
+        """Called by the access log middleware for every request; cheap unless it was slow."""
+        self.durations.append(duration)
+        if next(self._finished) % self.REFRESH == 0:
+            ordered = sorted(self.durations)
+            index = int(len(ordered) * (1 - self.percent / 100))
+            self.threshold = ordered[min(index, len(ordered) - 1)]
+        if duration > self.threshold:
+            self.pending.append((started, started + duration, route, request_id))
+
+    def tick(self) -> None:
+        now = time.perf_counter()
+        # A request is saved once a sample past its end has been taken
+        while self.pending and self.pending[0][1] < now - self.interval:
+            started, ended, route, request_id = self.pending.popleft()
+            # At most one profile a second; slow requests beyond that are skipped
+            if now - self.last_saved >= self.MIN_SECONDS_BETWEEN_PROFILES:
+                self.save(started, ended, route, request_id)
+                self.last_saved = now
+
+    def save(self, started: float, ended: float, route: str, request_id: str) -> None:
+        result = Profile(self.interval)
+        result.duration = ended - started
+        for at, stack in self.samples:
+            if started <= at <= ended:
+                result.counts[stack] += 1
+        name = f"{route} {request_id} {result.duration * 1000:.0f}ms"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{int(time.time() * 1000)}-{request_id}.speedscope.json"
+        path.write_text(json.dumps(result.speedscope(name)))
+        for old in sorted(self.directory.glob("*.speedscope.json"))[: -self.keep]:
+            old.unlink(missing_ok=True)
+        logger.info(
+            "Profiled slow request %s %s (%.0fms) to %s",
+            route,
+            request_id,
+            result.duration * 1000,
+            path,
+            extra={"route": route, "profile_request_id": request_id, "profile": str(path)},
+        )
+
+
+def start_slow_request_profiler(
+    percent: float, interval: float, directory: str, keep: int
+) -> SlowRequestProfiler:
+    global slow_requests
+    slow_requests = SlowRequestProfiler(percent, interval, directory, keep)
+    slow_requests.start()
+    return slow_requests
+
+
+def stop_slow_request_profiler() -> None:
+    global slow_requests
+    if slow_requests is not None:
+        slow_requests.stop()
+        slow_requests = None
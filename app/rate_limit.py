@@ -1,4 +1,191 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Protocol, TypeVar
 
-limiter = Limiter(key_func=get_remote_address)
+from anyio import to_thread
+
+from app.config import get_settings
+
+settings = get_settings()
+
+F = TypeVar("F", bound=Callable[..., object])
+
+RATE_PATTERN = re.compile(
+    r"\s*(\d+)\s*(?:/|per)\s*(\d+)?\s*(second|minute|hour|day)s?\s*", re.IGNORECASE
+)
+UNIT_SECONDS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# How often each process drops keys whose window has fully recovered
+SWEEP_INTERVAL_SECONDS = 60.0
+
+
+@dataclass(frozen=True)
+class Rate:
+    """`limit` requests per `period` seconds, from e.g. "100/minute" or "5 per 10 seconds"."""
+
+    limit: int
+    period: float
+    text: str
+
+    @classmethod
+    def parse(cls, text: str) -> "Rate":
+        match = RATE_PATTERN.fullmatch(text)
+        if match is None or int(match[1]) < 1:
+            raise ValueError(f"Invalid rate limit {text!r}")
+        period = int(match[2] or 1) * UNIT_SECONDS[match[3].lower()]
+        return cls(int(match[1]), float(period), text.strip())
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.limit
+
+
+class Storage(Protocol):
+    # True when acquire does IO, so it must run off the event loop
+    blocking: bool
+
+    def acquire(self, key: str, rate: Rate, now: float) -> float:
+        """Take one request for `key`; return 0 if allowed, else seconds until it would be."""
+        ...
+
+    def reset(self) -> None: ...
+
+
+class MemoryStorage:
+    """Theoretical arrival times in a dict; each process enforces its own limits."""
+
+    blocking = False
+
+    def __init__(self) -> None:
+        self._tats: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def acquire(self, key: str, rate: Rate, now: float) -> float:
+        with self._lock:
+            if now >= self._next_sweep:
+                self._tats = {k: tat for k, tat in self._tats.items() if tat > now}
+                self._next_sweep = now + SWEEP_INTERVAL_SECONDS
+            tat = max(self._tats.get(key, now), now) + rate.interval
+            if tat - now > rate.period:
+                return tat - now - rate.period
+            self._tats[key] = tat
+            return 0.0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tats.clear()
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+class SQLiteStorage:
+    """Theoretical arrival times in a SQLite file shared by every worker on the host.
+
+    Each acquire is one upsert, which SQLite serializes across processes, so
+    N workers enforce one limit between them. The file holds nothing worth
+    keeping across a crash, hence synchronous=OFF.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._pid = 0
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection must not cross a fork, so open one per process
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path, timeout=5.0, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)"
+                " WITHOUT ROWID"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def acquire(self, key: str, rate: Rate, now: float) -> float:
+        with self._lock:
+            conn = self._connect()
+            if now >= self._next_sweep:
+                conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+                self._next_sweep = now + SWEEP_INTERVAL_SECONDS
+            params = {"key": key, "now": now, "interval": rate.interval, "period": rate.period}
+            # The WHERE skips the update when over the limit, and RETURNING then yields no row
+            row = conn.execute(
+                "INSERT INTO rate_limits (key, tat) VALUES (:key, :now + :interval)"
+                " ON CONFLICT (key) DO UPDATE SET tat = max(tat, :now) + :interval"
+                " WHERE max(tat, :now) + :interval - :now <= :period"
+                " RETURNING tat",
+                params,
+            ).fetchone()
+            if row is not None:
+                return 0.0
+            (tat,) = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            return float(tat) + rate.interval - now - rate.period
+
+    def reset(self) -> None:
+        with self._lock:
+            self._connect().execute("DELETE FROM rate_limits")
+
+
+def storage_from_url(url: str) -> Storage:
+    if url == "memory://":
+        return MemoryStorage()
+    if url.startswith("sqlite:///"):
+        return SQLiteStorage(url.removeprefix("sqlite:///"))
+    raise ValueError(f"Unsupported rate limit storage {url!r}")
+
+
+class Limiter:
+    """GCRA rate limits per client address, declared on endpoints with `@limiter.limit`.
+
+    The decorator only records the rate; RateLimitMiddleware enforces it
+    before the request reaches the endpoint. Each (endpoint, client) pair
+    costs one float in storage: the time at which its bucket would be empty.
+    """
+
+    def __init__(self, storage: Storage) -> None:
+        self.storage = storage
+        self.rates: dict[Callable[..., object], Rate] = {}
+
+    def limit(self, rate: str) -> Callable[[F], F]:
+        parsed = Rate.parse(rate)
+
+        def register(endpoint: F) -> F:
+            self.rates[endpoint] = parsed
+            return endpoint
+
+        return register
+
+    async def hit(self, key: str, rate: Rate) -> float:
+        """Count a request; return 0 if allowed, else seconds until the next one would be."""
+        now = time.time()
+        if self.storage.blocking:
+            # A shared file may wait on another worker's lock for up to its 5s timeout
+            return await to_thread.run_sync(self.storage.acquire, key, rate, now)
+        return self.storage.acquire(key, rate, now)
+
+    def reset(self) -> None:
+        self.storage.reset()
+
+
+def retry_after(wait: float) -> str:
+    return str(max(1, math.ceil(wait)))
+
+
+limiter = Limiter(storage_from_url(settings.rate_limit_storage_url))
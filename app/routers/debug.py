@@ -0,0 +1,54 @@
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app import profiling
+from app.auth import get_current_admin
+from app.config import get_settings
+from app.models import ProfileFormat, ProfileMode
+
+settings = get_settings()
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+@router.get(
+    "/profile",
+    responses={200: {"content": {"text/plain": {}, "application/json": {}}}},
+    summary="Profile the running worker",
+)
+async def get_profile(
+    seconds: float = Query(5.0, gt=0, le=60, description="How long to sample"),
+    fmt: ProfileFormat = Query(ProfileFormat.collapsed, alias="format", description="Output"),
+    mode: ProfileMode = Query(
+        ProfileMode.wall, description="Sample every thread (wall) or only threads using CPU"
+    ),
+    interval_ms: float | None = Query(None, ge=1, le=1000, description="Sampling interval"),
+    _: str = Depends(get_current_admin),
+) -> Response:
+    """
+    Sample the stacks of every thread in this worker process for `seconds`.
+
+    `collapsed` is one "frame;frame;frame count" line per stack, ready for
+    flamegraph.pl; `speedscope` loads in https://www.speedscope.app. Only one
+    profile runs at a time per worker, and nothing runs between profiles.
+    Returns 404 unless profiling is enabled.
+    """
+    if not settings.profiling_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    interval = (interval_ms or settings.profile_interval_ms) / 1000
+    try:
+        result = await profiling.profile(seconds, interval, cpu_only=mode is ProfileMode.cpu)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e)) from None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from None
+
+    if fmt is ProfileFormat.collapsed:
+        return PlainTextResponse(result.collapsed())
+    name = f"{mode.value}-{time.strftime('%Y%m%dT%H%M%S')}"
+    return JSONResponse(
+        result.speedscope(name),
+        headers={"Content-Disposition": f'attachment; filename="{name}.speedscope.json"'},
+    )
@@ -1,24 +1,46 @@
 import logging
+from collections.abc import AsyncIterator, Iterator, Sequence
+from datetime import datetime, timedelta
+from typing import Any, NoReturn
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app import crud
+from app import crud, passwords
 from app.auth import (
-    DEMO_USER,
     LoginRequest,
     RefreshRequest,
     Token,
     create_access_token,
     create_refresh_token,
     get_current_user,
-    verify_password,
     verify_refresh_token,
 )
+from app.cache import count_cache, task_cache
 from app.config import get_settings
-from app.database import TaskDB, get_db
-from app.models import TaskCreate, TaskResponse, TaskStatus, TaskUpdate
+from app.database import AnySession, get_read_session, get_session, utc_now
+from app.etags import http_date, if_match_versions, list_etag, none_match, not_modified_since
+from app.imports import TaskImporter
+from app.models import (
+    SearchMode,
+    TaskBatchResult,
+    TaskBatchUpdate,
+    TaskBulkDeleteResponse,
+    TaskCreate,
+    TaskDailyStats,
+    TaskFileFormat,
+    TaskImportResult,
+    TaskResponse,
+    TaskStats,
+    TaskStatus,
+    TaskUpdate,
+)
+from app.pagination import decode_cursor, encode_cursor
 from app.rate_limit import limiter
+from app.serializers import render_csv, render_ndjson, render_task, render_tasks
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -27,8 +49,13 @@ router = APIRouter(prefix="/api/v1", tags=["v1"])
 
 
 @router.post("/login", response_model=Token, summary="Authenticate user")
-@limiter.limit("10/minute")
-def login(request: Request, login_request: LoginRequest) -> dict[str, str]:
+@limiter.limit(settings.login_rate_limit)
+async def login(
+    request: Request,
+    login_request: LoginRequest,
+    read_db: AnySession = Depends(get_read_session),
+    db: AnySession = Depends(get_session),
+) -> dict[str, str]:
     """
     Authenticate with username and password to receive JWT tokens.
 
@@ -37,15 +64,22 @@ def login(request: Request, login_request: LoginRequest) -> dict[str, str]:
 
     Returns access token (30 min) and refresh token (7 days).
     """
-    if login_request.username != DEMO_USER["username"] or not verify_password(
-        login_request.password, DEMO_USER["hashed_password"]
-    ):
+    user = await crud.run(read_db, crud.get_user, login_request.username)
+    # No connection is held while the password is checked; the writer session
+    # only checks one out if the hash has to be upgraded
+    await crud.release(read_db)
+    # Unknown users are checked against a dummy hash so both cases take as long
+    hashed = user.hashed_password if user is not None else await passwords.dummy_hash()
+    if not await passwords.verify_password_async(login_request.password, hashed) or user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
         )
-    access_token = create_access_token(data={"sub": login_request.username})
-    refresh_token = create_refresh_token(data={"sub": login_request.username})
+    if passwords.needs_rehash(hashed):
+        rehashed = await passwords.hash_password_async(login_request.password)
+        await crud.run(db, crud.set_user_password, user.id, rehashed)
+    access_token = create_access_token(data={"sub": user.username})
+    refresh_token = create_refresh_token(data={"sub": user.username})
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -55,7 +89,7 @@ def login(request: Request, login_request: LoginRequest) -> dict[str, str]:
 
 @router.post("/refresh", response_model=Token, summary="Refresh access token")
 @limiter.limit("30/minute")
-def refresh(request: Request, refresh_request: RefreshRequest) -> dict[str, str]:
+async def refresh(request: Request, refresh_request: RefreshRequest) -> dict[str, str]:
     """
     Get a new access token using a valid refresh token.
 
@@ -79,12 +113,12 @@ def refresh(request: Request, refresh_request: RefreshRequest) -> dict[str, str]
     summary="Create a new task",
 )
 @limiter.limit(settings.rate_limit)
-def create_task(
+async def create_task(
     request: Request,
     task: TaskCreate,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
     _: str = Depends(get_current_user),
-) -> TaskDB:
+) -> Response:
     """
     Create a new task with the following fields:
 
@@ -92,59 +126,424 @@ def create_task(
     - **description**: Optional description
     - **status**: pending, in_progress, or completed (default: pending)
     """
-    return crud.create_task(db, task)
+    db_task = await crud.run(db, crud.create_task, task)
+    body = render_task(db_task)
+    task_cache.set(db_task.id, body)
+    return Response(
+        content=body.json,
+        status_code=status.HTTP_201_CREATED,
+        headers=body.headers,
+        media_type="application/json",
+    )
+
+
+def check_batch_size(items: Sequence[object]) -> None:
+    if len(items) > settings.max_batch_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds maximum size of {settings.max_batch_size}",
+        )
+
+
+@router.post(
+    "/tasks:batch",
+    response_model=list[TaskResponse],
+    status_code=status.HTTP_201_CREATED,
+    summary="Create tasks in bulk",
+)
+@limiter.limit(settings.rate_limit)
+async def create_tasks_batch(
+    request: Request,
+    tasks: list[TaskCreate],
+    db: AnySession = Depends(get_session),
+    _: str = Depends(get_current_user),
+) -> list[Row[Any]]:
+    """
+    Create many tasks in a single transaction.
+
+    Returns the created tasks in request order. If any item is invalid the
+    whole batch is rejected.
+    """
+    check_batch_size(tasks)
+    created = await crud.run(db, crud.create_tasks, tasks)
+    for row in created:
+        task_cache.set(row.id, render_task(row))
+    return created
+
+
+@router.patch(
+    "/tasks:batch",
+    response_model=list[TaskBatchResult],
+    summary="Update tasks in bulk",
+)
+@limiter.limit(settings.rate_limit)
+async def update_tasks_batch(
+    request: Request,
+    items: list[TaskBatchUpdate],
+    db: AnySession = Depends(get_session),
+    _: str = Depends(get_current_user),
+) -> list[TaskBatchResult]:
+    """
+    Partially update many tasks in a single transaction.
+
+    Each item carries the task **id** plus the fields to change. The
+    response has one result per item, in request order.
+    """
+    check_batch_size(items)
+    if len({item.id for item in items}) != len(items):
+        raise HTTPException(status_code=422, detail="Duplicate task ids in batch")
+
+    updated = await crud.run(db, crud.update_tasks, items)
+    for task_id, row in updated.items():
+        task_cache.set(task_id, render_task(row))
+    return [
+        TaskBatchResult(
+            id=item.id,
+            result="updated" if item.id in updated else "not_found",
+            task=TaskResponse.model_validate(updated[item.id]) if item.id in updated else None,
+        )
+        for item in items
+    ]
+
+
+@router.delete(
+    "/tasks",
+    response_model=TaskBulkDeleteResponse,
+    summary="Delete tasks by status",
+)
+@limiter.limit(settings.rate_limit)
+async def delete_tasks(
+    request: Request,
+    status: TaskStatus = Query(..., description="Delete every task with this status"),
+    db: AnySession = Depends(get_session),
+    _: str = Depends(get_current_user),
+) -> dict[str, int]:
+    """
+    Permanently delete all tasks matching the filter in one statement.
+    """
+    deleted_ids = await crud.run(db, crud.delete_tasks, status)
+    for task_id in deleted_ids:
+        task_cache.pop(task_id)
+    return {"deleted": len(deleted_ids)}
+
+
+async def count_matching_tasks(
+    db: AnySession, status: TaskStatus | None, search: str | None, search_mode: SearchMode
+) -> tuple[int, bool]:
+    """Total for the list filters, and whether it is exact rather than cached."""
+    if search is None:
+        return await crud.run(db, crud.count_tasks, status=status), True
+    key = (status, search, search_mode)
+    total = count_cache.get(key)
+    if total is not None:
+        return total, False
+    total = await crud.run(
+        db, crud.count_tasks, status=status, search=search, search_mode=search_mode
+    )
+    count_cache.set(key, total)
+    return total, True
 
 
 @router.get("/tasks", response_model=list[TaskResponse], summary="List all tasks")
 @limiter.limit(settings.rate_limit)
-def list_tasks(
+async def list_tasks(
     request: Request,
     status: TaskStatus | None = Query(None, description="Filter by status"),
     search: str | None = Query(None, description="Search in title (case-insensitive)"),
+    search_mode: SearchMode = Query(
+        SearchMode.title_only,
+        description="Search only the title, or title and description (fulltext)",
+    ),
+    rank: bool = Query(False, description="Order search results by relevance"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=100, description="Max records to return"),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(
+        None, description="Opaque cursor from the X-Next-Cursor header of a previous page"
+    ),
+    include_total: bool = Query(
+        False, description="Count every matching task into the X-Total-Count header"
+    ),
+    db: AnySession = Depends(get_read_session),
     _: str = Depends(get_current_user),
-) -> list[TaskDB]:
+) -> Response:
     """
     Retrieve a list of tasks with optional filtering and pagination.
+
+    Tasks are ordered by ID. When more results are available the response
+    carries an **X-Next-Cursor** header; pass it back as `cursor` to fetch
+    the next page at constant cost regardless of depth.
+
+    `search` matches substrings case-insensitively using a full-text index.
+    Set `rank=true` to order matches by relevance instead (use `skip` to page);
+    searches shorter than 3 characters cannot be ranked and stay in ID order.
+
+    Pages carry a weak **ETag**; send it back in `If-None-Match` to get
+    `304 Not Modified` while the page is unchanged.
+
+    With `include_total=true`, **X-Total-Count** is the number of tasks
+    matching the filters across all pages. **X-Total-Count-Accuracy** is
+    `exact`, or `estimated` when a search's count was reused from the last
+    `COUNT_CACHE_TTL_SECONDS` and may have drifted since.
     """
-    return crud.get_tasks(db, status=status, search=search, skip=skip, limit=limit)
+    ranked = crud.is_ranked(db, search, rank)
+    if ranked and cursor is not None:
+        raise HTTPException(status_code=400, detail="Cursor pagination is not supported with rank")
+
+    after_id = None
+    if cursor is not None:
+        try:
+            after_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+    # Fetch one extra row to learn whether another page exists
+    tasks = await crud.run(
+        db,
+        crud.get_tasks,
+        status=status,
+        search=search,
+        skip=skip,
+        limit=limit + 1,
+        after_id=after_id,
+        search_mode=search_mode,
+        rank=ranked,
+    )
+    headers: dict[str, str] = {}
+    if include_total:
+        total, exact = await count_matching_tasks(db, status, search, search_mode)
+        headers["X-Total-Count"] = str(total)
+        headers["X-Total-Count-Accuracy"] = "exact" if exact else "estimated"
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        if not ranked:
+            headers["X-Next-Cursor"] = encode_cursor(tasks[-1].id)
+
+    headers["ETag"] = list_etag(tasks)
+    if tasks:
+        headers["Last-Modified"] = http_date(max(task.updated_at for task in tasks))
+    if none_match(request.headers.get("If-None-Match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(render_tasks(tasks), media_type="application/json", headers=headers)
+
+
+EXPORT_MEDIA_TYPES = {TaskFileFormat.ndjson: "application/x-ndjson", TaskFileFormat.csv: "text/csv"}
+
+
+def _export_rows(db: Session, fmt: TaskFileFormat, **filters: Any) -> Iterator[bytes]:
+    # FastAPI may close the dependency's session before the body is sent,
+    # so the stream owns the session from here on and closes it when done.
+    try:
+        if fmt is TaskFileFormat.csv:
+            yield render_csv([], header=True)
+        for batch in crud.stream_tasks(db, batch_size=settings.export_batch_size, **filters):
+            yield render_ndjson(batch) if fmt is TaskFileFormat.ndjson else render_csv(batch)
+    finally:
+        db.close()
+
+
+async def _aexport_rows(
+    db: AsyncSession, fmt: TaskFileFormat, **filters: Any
+) -> AsyncIterator[bytes]:
+    try:
+        if fmt is TaskFileFormat.csv:
+            yield render_csv([], header=True)
+        batches = crud.astream_tasks(db, batch_size=settings.export_batch_size, **filters)
+        async for batch in batches:
+            yield render_ndjson(batch) if fmt is TaskFileFormat.ndjson else render_csv(batch)
+    finally:
+        await db.close()
+
+
+# Registered before /tasks/{task_id} so "export" is not parsed as an id
+@router.get(
+    "/tasks/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {media: {} for media in EXPORT_MEDIA_TYPES.values()}}},
+    summary="Export tasks as NDJSON or CSV",
+)
+@limiter.limit(settings.rate_limit)
+async def export_tasks(
+    request: Request,
+    fmt: TaskFileFormat = Query(TaskFileFormat.ndjson, alias="format", description="Output format"),
+    status: TaskStatus | None = Query(None, description="Filter by status"),
+    search: str | None = Query(None, description="Search in title (case-insensitive)"),
+    search_mode: SearchMode = Query(
+        SearchMode.title_only,
+        description="Search only the title, or title and description (fulltext)",
+    ),
+    db: AnySession = Depends(get_read_session),
+    _: str = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    Stream every matching task in ID order, in a single response.
+
+    Rows are read in batches and written as they arrive, so memory use is
+    constant and the first bytes are sent immediately. No database
+    connection is held while the client reads between batches.
+    Accepts the same `status`, `search` and `search_mode` filters as the list.
+    """
+    filters = {"status": status, "search": search, "search_mode": search_mode}
+    body = (
+        _aexport_rows(db, fmt, **filters)
+        if isinstance(db, AsyncSession)
+        else _export_rows(db, fmt, **filters)
+    )
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{fmt.value}"'},
+    )
+
+
+@router.post(
+    "/tasks/import",
+    response_model=TaskImportResult,
+    summary="Import tasks from NDJSON or CSV",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {media: {} for media in EXPORT_MEDIA_TYPES.values()},
+        }
+    },
+)
+@limiter.limit(settings.rate_limit)
+async def import_tasks(
+    request: Request,
+    fmt: TaskFileFormat = Query(TaskFileFormat.ndjson, alias="format", description="Body format"),
+    dry_run: bool = Query(False, description="Validate only, insert nothing"),
+    db: AnySession = Depends(get_session),
+    _: str = Depends(get_current_user),
+) -> TaskImportResult:
+    """
+    Create tasks from an NDJSON or CSV body of any size.
+
+    The body is parsed as it arrives and validated against the create
+    schema. Valid rows are inserted in chunks of `IMPORT_CHUNK_SIZE`, each
+    committed on its own, so a failure part-way keeps the chunks already
+    written. Invalid lines are skipped and reported by line number.
+
+    CSV bodies need a header row with at least a `title` column; the
+    export's CSV can be imported as-is.
+    """
+
+    async def insert(tasks: list[TaskCreate]) -> int:
+        return await crud.run(db, crud.import_tasks, tasks)
+
+    importer = TaskImporter(
+        fmt,
+        None if dry_run else insert,
+        chunk_size=settings.import_chunk_size,
+        max_errors=settings.import_max_errors,
+        max_line_bytes=settings.import_max_line_bytes,
+    )
+    try:
+        return await importer.run(request.stream())
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from None
+
+
+@router.get("/tasks/stats", response_model=TaskStats, summary="Task counts for dashboards")
+@limiter.limit(settings.rate_limit)
+async def get_task_stats(
+    request: Request,
+    days: int = Query(30, ge=1, le=366, description="Days of daily counts, up to today"),
+    db: AnySession = Depends(get_read_session),
+    _: str = Depends(get_current_user),
+) -> TaskStats:
+    """
+    Count tasks per status, and tasks created and completed per UTC day.
+
+    Served from summary tables that every task write keeps current, so the
+    cost does not grow with the number of tasks. A day's `completed` counts
+    the tasks completed that day that are still completed and not deleted.
+    """
+    today = utc_now().date()
+    since = today - timedelta(days=days - 1)
+    statuses, rows = await crud.run(db, crud.get_task_stats, since)
+    by_status = {task_status: statuses.get(task_status, 0) for task_status in TaskStatus}
+    counted = {row.day: row for row in rows}
+    daily = []
+    for offset in range(days):
+        day = since + timedelta(days=offset)
+        row = counted.get(day)
+        daily.append(
+            TaskDailyStats(
+                day=day,
+                created=row.created if row is not None else 0,
+                completed=row.completed if row is not None else 0,
+            )
+        )
+    return TaskStats(total=sum(by_status.values()), by_status=by_status, daily=daily)
 
 
 @router.get("/tasks/{task_id}", response_model=TaskResponse, summary="Get a task by ID")
 @limiter.limit(settings.rate_limit)
-def get_task(
+async def get_task(
     request: Request,
     task_id: int,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_read_session),
     _: str = Depends(get_current_user),
-) -> TaskDB:
+) -> Response:
     """
     Retrieve a single task by its ID.
+
+    Responses carry a strong **ETag** and **Last-Modified**; conditional
+    requests with `If-None-Match` or `If-Modified-Since` get
+    `304 Not Modified` while the task is unchanged.
     """
-    db_task = crud.get_task(db, task_id)
-    if db_task is None:
-        raise HTTPException(status_code=404, detail="Task not found")
-    return db_task
+    body = task_cache.get(task_id)
+    if body is None:
+        db_task = await crud.run(db, crud.get_task, task_id)
+        if db_task is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        body = render_task(db_task)
+        # A lagging replica may return a row older than the last write-through
+        if settings.database_read_url is None:
+            task_cache.fill(task_id, body)
+
+    if_none_match = request.headers.get("If-None-Match")
+    if none_match(if_none_match, body.etag) or (
+        if_none_match is None
+        and not_modified_since(request.headers.get("If-Modified-Since"), body.updated_at)
+    ):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=body.headers)
+    return Response(content=body.json, headers=body.headers, media_type="application/json")
+
+
+async def raise_write_failure(
+    db: AnySession, task_id: int, versions: list[datetime] | None
+) -> NoReturn:
+    """Explain why a conditional write matched no row: missing or modified."""
+    if versions is not None and await crud.run(db, crud.get_task, task_id) is not None:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Task has been modified",
+        )
+    raise HTTPException(status_code=404, detail="Task not found")
 
 
 @router.put("/tasks/{task_id}", response_model=TaskResponse, summary="Update a task")
 @limiter.limit(settings.rate_limit)
-def update_task(
+async def update_task(
     request: Request,
     task_id: int,
     task: TaskUpdate,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
     _: str = Depends(get_current_user),
-) -> TaskDB:
+) -> Response:
     """
     Update an existing task. All fields are optional.
+
+    Send the task's **ETag** in `If-Match` to update only if nobody else
+    has changed it since; otherwise the request fails with 412.
     """
-    db_task = crud.update_task(db, task_id, task)
+    versions = if_match_versions(request.headers.get("If-Match"), task_id)
+    db_task = await crud.run(db, crud.update_task, task_id, task, versions)
     if db_task is None:
-        raise HTTPException(status_code=404, detail="Task not found")
-    return db_task
+        await raise_write_failure(db, task_id, versions)
+    body = render_task(db_task)
+    task_cache.set(task_id, body)
+    return Response(content=body.json, headers=body.headers, media_type="application/json")
 
 
 @router.delete(
@@ -153,14 +552,19 @@ def update_task(
     summary="Delete a task",
 )
 @limiter.limit(settings.rate_limit)
-def delete_task(
+async def delete_task(
     request: Request,
     task_id: int,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
     _: str = Depends(get_current_user),
 ) -> None:
     """
     Permanently delete a task by its ID.
+
+    Send the task's **ETag** in `If-Match` to delete only if it is unchanged.
     """
-    if not crud.delete_task(db, task_id):
-        raise HTTPException(status_code=404, detail="Task not found")
+    versions = if_match_versions(request.headers.get("If-Match"), task_id)
+    deleted = await crud.run(db, crud.delete_task, task_id, versions)
+    task_cache.pop(task_id)
+    if not deleted:
+        await raise_write_failure(db, task_id, versions)
@@ -0,0 +1,64 @@
+import csv
+import io
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, NamedTuple
+
+from pydantic import TypeAdapter
+
+from app.etags import http_date, task_etag
+from app.models import TaskResponse
+
+
+class TaskBody(NamedTuple):
+    """A serialized task together with its HTTP validators."""
+
+    json: bytes
+    etag: str
+    updated_at: datetime
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"ETag": self.etag, "Last-Modified": http_date(self.updated_at)}
+
+
+def render_task(task: Any) -> TaskBody:
+    """Serialize an ORM instance or row to the JSON body FastAPI would send."""
+    model = TaskResponse.model_validate(task)
+    return TaskBody(
+        model.model_dump_json().encode(), task_etag(model.id, model.updated_at), model.updated_at
+    )
+
+
+# Validation and dumping both run inside pydantic-core, once for the whole page
+_task_list = TypeAdapter(list[TaskResponse])
+
+
+def render_tasks(tasks: Sequence[Any]) -> bytes:
+    """Serialize rows to the same JSON FastAPI would produce for list[TaskResponse]."""
+    return _task_list.dump_json(_task_list.validate_python(tasks, from_attributes=True))
+
+
+_task = TypeAdapter(TaskResponse)
+
+CSV_COLUMNS = list(TaskResponse.model_fields)
+
+
+def render_ndjson(tasks: Sequence[Any]) -> bytes:
+    """Serialize rows as newline-delimited JSON, one TaskResponse object per line."""
+    return b"".join(
+        _task.dump_json(model) + b"\n"
+        for model in _task_list.validate_python(tasks, from_attributes=True)
+    )
+
+
+def render_csv(tasks: Sequence[Any], header: bool = False) -> bytes:
+    """Serialize rows as CSV using the JSON representation of each field."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+    if header:
+        writer.writeheader()
+    writer.writerows(
+        _task_list.dump_python(_task_list.validate_python(tasks, from_attributes=True), mode="json")
+    )
+    return buffer.getvalue().encode()
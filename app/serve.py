@@ -0,0 +1,84 @@
+"""Production server.
+
+python -m app.serve [--host HOST] [--port PORT] [--workers N]
+
+Migrates the schema once, then starts uvicorn with N worker processes
+(one per CPU by default), uvloop and httptools when installed, and a
+graceful drain of in-flight requests on SIGTERM.
+"""
+
+import argparse
+import logging
+import os
+from typing import Any
+
+import uvicorn
+
+from app.config import Settings, get_settings
+from app.database import engine
+from app.logging_config import setup_logging
+from app.migrations import migrate
+
+logger = logging.getLogger(__name__)
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on, which honors taskset and cpuset limits where known."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def worker_count(requested: int) -> int:
+    return requested if requested > 0 else available_cpus()
+
+
+def server_options(args: argparse.Namespace, settings: Settings) -> dict[str, Any]:
+    return {
+        "host": args.host,
+        "port": args.port,
+        "workers": worker_count(args.workers),
+        # "auto" picks uvloop and httptools when installed (uvicorn[standard])
+        "loop": "auto",
+        "http": "auto",
+        "backlog": settings.server_backlog,
+        "timeout_keep_alive": settings.server_keepalive_timeout,
+        "timeout_graceful_shutdown": settings.server_graceful_timeout,
+        # RequestLoggingMiddleware writes the access log, and setup_logging owns handlers
+        "access_log": False,
+        "log_config": None,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(prog="python -m app.serve")
+    parser.add_argument("--host", default=settings.server_host)
+    parser.add_argument("--port", type=int, default=settings.server_port)
+    parser.add_argument(
+        "--workers", type=int, default=settings.server_workers, help="0 means one per CPU"
+    )
+    options = server_options(parser.parse_args(argv), settings)
+
+    setup_logging(settings.debug)
+    if options["workers"] > 1 and settings.rate_limit_storage_url == "memory://":
+        logger.warning(
+            "Each of the %d workers enforces its own rate limits; set RATE_LIMIT_STORAGE_URL "
+            "to a shared sqlite file to enforce them per host",
+            options["workers"],
+        )
+
+    # Workers are spawned, not forked, so they read the environment afresh
+    if settings.migrate_on_startup:
+        migrate(engine)
+        settings.migrate_on_startup = False
+        os.environ["MIGRATE_ON_STARTUP"] = "false"
+
+    logger.info(
+        "Starting %d workers on %s:%d", options["workers"], options["host"], options["port"]
+    )
+    uvicorn.run("app.main:app", **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Fail if a load test result regressed against a stored baseline.
+
+    python -m benchmarks.compare BASELINE RESULTS [--tolerance 0.3]
+
+Compares files written by benchmarks.load. Exits 1 when:
+- total req/s dropped by more than the tolerance,
+- any operation's p50 latency grew by more than the tolerance,
+- the p95 latency grew by more than that for an operation with at least
+  MIN_TAIL_SAMPLES requests (rarer ones have too noisy a tail), or
+- an operation failed requests that passed in the baseline.
+Both runs should come from the same machine and the same load options.
+"""
+
+import argparse
+import json
+import sys
+from typing import Any
+
+CONFIG_KEYS = ("tasks", "requests", "concurrency", "target", "workers")
+MIN_TAIL_SAMPLES = 200
+
+
+def regressions(baseline: dict[str, Any], results: dict[str, Any], tolerance: float) -> list[str]:
+    found = []
+    base_rps, rps = baseline["total"]["rps"], results["total"]["rps"]
+    if rps < base_rps * (1 - tolerance):
+        found.append(f"total: {rps:.0f} req/s, baseline {base_rps:.0f}")
+    for name, base in baseline["operations"].items():
+        current = results["operations"].get(name)
+        if current is None:
+            found.append(f"{name}: missing from results")
+            continue
+        percentiles = ["p50_ms"]
+        if min(base["requests"], current["requests"]) >= MIN_TAIL_SAMPLES:
+            percentiles.append("p95_ms")
+        for key in percentiles:
+            if current[key] > base[key] * (1 + tolerance):
+                found.append(f"{name}: {key} {current[key]:.2f}, baseline {base[key]:.2f}")
+        if current["errors"] > base["errors"]:
+            found.append(f"{name}: {current['errors']} errors, baseline {base['errors']}")
+    return found
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("results")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.3, help="allowed relative slowdown (0.3 = 30%%)"
+    )
+    args = parser.parse_args(argv)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.results) as f:
+        results = json.load(f)
+
+    for key in CONFIG_KEYS:
+        if baseline["config"].get(key) != results["config"].get(key):
+            print(
+                f"warning: {key} differs from the baseline "
+                f"({results['config'].get(key)} vs {baseline['config'].get(key)})",
+                file=sys.stderr,
+            )
+
+    found = regressions(baseline, results, args.tolerance)
+    for line in found:
+        print(f"REGRESSION {line}")
+    if not found:
+        print(
+            f"OK: {results['total']['rps']:.0f} req/s "
+            f"(baseline {baseline['total']['rps']:.0f}), no latency regressions"
+        )
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
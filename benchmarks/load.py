@@ -0,0 +1,305 @@
+"""Mixed-workload load test against a freshly seeded database.
+
+    python -m benchmarks.load [--tasks 10000] [--requests 4000] [--concurrency 8]
+        [--target asgi|uvicorn] [--workers 1] [--seed 0] [--output results.json]
+
+Seeds `--tasks` tasks into a throwaway SQLite database, then replays a
+fixed, seeded mix of login, create, get, filtered list, deep pagination,
+search, update and delete requests with `--concurrency` clients. The
+`asgi` target calls the app in process; `uvicorn` starts python -m
+app.serve and goes over HTTP. Throughput and p50/p95/p99 latency, overall
+and per operation, are printed and written as JSON for benchmarks.compare.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+# Operation: relative weight in the mix
+WORKLOAD = {
+    "login": 1,
+    "create": 10,
+    "get": 30,
+    "list_status": 15,
+    "page_deep_offset": 4,
+    "page_deep_cursor": 4,
+    "search": 10,
+    "update": 16,
+    "delete": 10,
+}
+
+WORDS = ("alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel")
+STATUSES = ("pending", "in_progress", "completed")
+
+SEED_SQL = """
+WITH RECURSIVE seq(i) AS (SELECT :first UNION ALL SELECT i + 1 FROM seq WHERE i < :last)
+INSERT INTO tasks (title, description, status, created_at, updated_at)
+SELECT
+    'Task ' || i || ' ' || CASE i % 8 {words} END,
+    'Seeded task number ' || i,
+    CASE i % 3 {statuses} END,
+    :now, :now
+FROM seq
+"""
+
+
+def seed_database(url: str, tasks: int, spare: int) -> None:
+    """Create the schema and `tasks + spare` tasks; ids above `tasks` are for deleting."""
+    from sqlalchemy import DateTime, bindparam, create_engine, text
+
+    from app.database import utc_now
+    from app.migrations import migrate
+
+    engine = create_engine(url)
+    migrate(engine)
+    sql = SEED_SQL.format(
+        words=" ".join(f"WHEN {i} THEN '{word}'" for i, word in enumerate(WORDS)),
+        statuses=" ".join(f"WHEN {i} THEN '{status}'" for i, status in enumerate(STATUSES)),
+    )
+    statement = text(sql).bindparams(bindparam("now", type_=DateTime(timezone=True)))
+    total = tasks + spare
+    # Batches keep the recursive CTE and the transaction a manageable size at 1M rows
+    for first in range(1, total + 1, 100_000):
+        with engine.begin() as conn:
+            last = min(first + 99_999, total)
+            conn.execute(statement, {"first": first, "last": last, "now": utc_now()})
+    engine.dispose()
+
+
+@dataclass
+class State:
+    tasks: int
+    rng: random.Random
+    deletable: list[int]
+
+    def task_id(self) -> int:
+        return self.rng.randint(1, self.tasks)
+
+
+Operation = Callable[[httpx.AsyncClient, State], Awaitable[httpx.Response]]
+
+
+async def login(client: httpx.AsyncClient, state: State) -> httpx.Response:
+    return await client.post("/api/v1/login", json={"username": "admin", "password": "admin"})
+
+
+async def create(client: httpx.AsyncClient, state: State) -> httpx.Response:
+    title = f"Load {state.rng.choice(WORDS)}"
+    return await client.post("/api/v1/tasks", json={"title": title})
+
+
+async def get(client: httpx.AsyncClient, state: State) -> httpx.Response:
+    return await client.get(f"/api/v1/tasks/{state.task_id()}")
+
+
+async def list_status(client: httpx.AsyncClient, state: State) -> httpx.Response:
+    return await client.get("/api/v1/tasks", params={"status": state.rng.choice(STATUSES)})
+
+
+async def page_deep_offset(client: httpx.AsyncClient, state: State) -> httpx.Response:
+    skip = state.rng.randint(state.tasks * 9 // 10, state.tasks)
+    return await client.get("/api/v1/tasks", params={"skip": skip, "limit": 100})
+
+
+async def page_deep_cursor(client: httpx.AsyncClient, state: State) -> httpx.Response:
+    from app.pagination import encode_cursor
+
+    after = state.rng.randint(state.tasks * 9 // 10, state.tasks)
+    return await client.get("/api/v1/tasks", params={"cursor": encode_cursor(after), "limit": 100})
+
+
+async def search(client: httpx.AsyncClient, state: State) -> httpx.Response:
+    return await client.get("/api/v1/tasks", params={"search": state.rng.choice(WORDS)})
+
+
+async def update(client: httpx.AsyncClient, state: State) -> httpx.Response:
+    body = {"status": state.rng.choice(STATUSES)}
+    return await client.put(f"/api/v1/tasks/{state.task_id()}", json=body)
+
+
+async def delete(client: httpx.AsyncClient, state: State) -> httpx.Response:
+    return await client.delete(f"/api/v1/tasks/{state.deletable.pop()}")
+
+
+OPERATIONS: dict[str, Operation] = {
+    "login": login,
+    "create": create,
+    "get": get,
+    "list_status": list_status,
+    "page_deep_offset": page_deep_offset,
+    "page_deep_cursor": page_deep_cursor,
+    "search": search,
+    "update": update,
+    "delete": delete,
+}
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int) -> dict[str, Any]:
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+    }
+
+
+async def drive(
+    client: httpx.AsyncClient, state: State, count: int, concurrency: int
+) -> dict[str, Any]:
+    login_response = await login(client, state)
+    login_response.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {login_response.json()['access_token']}"
+
+    names = list(WORKLOAD)
+    schedule = iter(state.rng.choices(names, weights=[WORKLOAD[n] for n in names], k=count))
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+
+    async def worker() -> None:
+        for name in schedule:
+            start = time.perf_counter()
+            response = await OPERATIONS[name](client, state)
+            latencies[name].append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors[name] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    everything = [latency for values in latencies.values() for latency in values]
+    return {
+        "total": summarize(everything, elapsed, sum(errors.values())),
+        "operations": {
+            name: summarize(latencies[name], elapsed, errors[name])
+            for name in names
+            if latencies[name]
+        },
+    }
+
+
+async def run_asgi(state: State, count: int, concurrency: int) -> dict[str, Any]:
+    from app.main import app
+
+    # Keep the app's info lines out of the printed results; warnings still show
+    logging.disable(logging.INFO)
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await drive(client, state, count, concurrency)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+async def run_uvicorn(state: State, count: int, concurrency: int, workers: int) -> dict[str, Any]:
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.serve", "--port", str(port), "--workers", str(workers)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+            for _ in range(300):
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None:
+                    raise RuntimeError(f"Server exited with status {server.returncode}")
+                await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("Server did not become healthy within 30s")
+            return await drive(client, state, count, concurrency)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10_000, help="tasks to seed, e.g. 1000000")
+    parser.add_argument("--requests", type=int, default=4000, help="requests in the mix")
+    parser.add_argument("--concurrency", type=int, default=8, help="clients in flight")
+    parser.add_argument("--target", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--workers", type=int, default=1, help="server workers (uvicorn)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the request mix")
+    parser.add_argument("--output", help="write the results here as JSON")
+    args = parser.parse_args()
+
+    # Deleted with the database once the run is over and the app has shut down
+    with tempfile.TemporaryDirectory() as directory:
+        database = f"{directory}/load.db"
+        # Set before the app is imported, here and in the server's workers
+        os.environ.update(
+            DATABASE_URL=f"sqlite:///{database}",
+            MIGRATE_ON_STARTUP="false",
+            RATE_LIMIT="1000000000/minute",
+            LOGIN_RATE_LIMIT="1000000000/minute",
+            ACCESS_LOG_SAMPLE_RATE="0",
+        )
+
+        start = time.perf_counter()
+        seed_database(os.environ["DATABASE_URL"], args.tasks, spare=args.requests)
+        print(f"Seeded {args.tasks} tasks in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        spare = range(args.tasks + 1, args.tasks + args.requests + 1)
+        state = State(tasks=args.tasks, rng=random.Random(args.seed), deletable=list(spare))
+        if args.target == "asgi":
+            results = asyncio.run(run_asgi(state, args.requests, args.concurrency))
+        else:
+            results = asyncio.run(run_uvicorn(state, args.requests, args.concurrency, args.workers))
+    results["config"] = {
+        **{name: getattr(args, name) for name in ("tasks", "requests", "concurrency", "seed")},
+        "target": args.target,
+        "workers": args.workers if args.target == "uvicorn" else None,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+    print(f"{'operation':>18} {'count':>6} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, row in [*results["operations"].items(), ("total", results["total"])]:
+        print(
+            f"{name:>18} {row['requests']:6d} {row['errors']:6d} "
+            f"{row['p50_ms']:8.2f} {row['p95_ms']:8.2f} {row['p99_ms']:8.2f}"
+        )
+    print(f"{results['total']['rps']:.0f} req/s")
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
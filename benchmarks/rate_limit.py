@@ -0,0 +1,87 @@
+"""Per-request cost of the rate limiter, by storage backend.
+
+    python -m benchmarks.rate_limit [--requests 50000] [--clients 1000]
+
+Times RateLimitMiddleware in front of a no-op ASGI app with one limited
+route, against the same app without it, cycling through `--clients`
+addresses so lookups are not all for one key.
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+from starlette.types import ASGIApp, Message, Scope
+
+from app.middleware import RateLimitMiddleware
+from app.rate_limit import Limiter, Storage, storage_from_url
+
+
+def build(storage: Storage | None) -> ASGIApp:
+    limiter = Limiter(storage or storage_from_url("memory://"))
+
+    @limiter.limit("1000000000/minute")
+    async def endpoint(request: Request) -> Response:
+        return Response()
+
+    routes = [Route("/items/{item_id}", endpoint)]
+    app = Starlette(routes=routes)
+    if storage is not None:
+        app.add_middleware(RateLimitMiddleware, limiter=limiter, routes=routes)
+    return app
+
+
+async def measure(app: ASGIApp, count: int, clients: int) -> float:
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b""}
+
+    async def send(message: Message) -> None:
+        pass
+
+    def scope(i: int) -> Scope:
+        return {
+            "type": "http",
+            "method": "GET",
+            "path": "/items/1",
+            "raw_path": b"/items/1",
+            "query_string": b"",
+            "headers": [],
+            "client": (f"10.0.{i // 256 % 256}.{i % 256}", 1234),
+            "server": ("bench", 80),
+            "scheme": "http",
+            "root_path": "",
+        }
+
+    scopes = [scope(i) for i in range(clients)]
+    for s in scopes:  # warm up: one entry per client, connections open
+        await app(dict(s), receive, send)
+    start = time.perf_counter()
+    for i in range(count):
+        await app(dict(scopes[i % clients]), receive, send)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+async def run(count: int, clients: int) -> None:
+    baseline = await measure(build(None), count, clients)
+    print(f"{'no limiter':>10}: {baseline:6.1f} us/request")
+    path = f"{tempfile.mkdtemp()}/ratelimit.db"
+    for name, url in (("memory", "memory://"), ("sqlite", f"sqlite:///{path}")):
+        elapsed = await measure(build(storage_from_url(url)), count, clients)
+        print(f"{name:>10}: {elapsed:6.1f} us/request (+{elapsed - baseline:.1f})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--clients", type=int, default=1000, help="distinct client addresses")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.clients))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare the ORM list path with the Core-row fast path for GET /tasks.
+
+    python -m benchmarks.serialize_tasks [--rows 100] [--repeat 2000]
+
+Both paths include the SELECT so the cost of building ORM entities is
+counted; the bodies are checked to be byte-identical before timing.
+"""
+
+import argparse
+import timeit
+from collections.abc import Callable
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud
+from app.database import Base, TaskDB
+from app.models import TaskCreate, TaskResponse
+from app.serializers import render_tasks
+
+
+def orm_path(db: Session, limit: int) -> bytes:
+    """What list_tasks did before: ORM entities validated, dumped and json.dumps'd."""
+    tasks = db.query(TaskDB).order_by(TaskDB.id).limit(limit).all()
+    models = [TaskResponse.model_validate(task) for task in tasks]
+    return bytes(JSONResponse(jsonable_encoder(models)).body)
+
+
+def fast_path(db: Session, limit: int) -> bytes:
+    return render_tasks(crud.get_tasks(db, limit=limit))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100, help="tasks per page")
+    parser.add_argument("--repeat", type=int, default=2000, help="pages to render per path")
+    args = parser.parse_args()
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    crud.create_tasks(
+        db,
+        [
+            TaskCreate(title=f"Task {i}", description="Lorem ipsum dolor sit amet " * 4)
+            for i in range(args.rows)
+        ],
+    )
+
+    paths: dict[str, Callable[[Session, int], Any]] = {"orm": orm_path, "fast": fast_path}
+    assert orm_path(db, args.rows) == fast_path(db, args.rows), "bodies differ"
+    timings = {}
+    for name, fn in paths.items():
+        # Clear the identity map between runs so the ORM path builds fresh entities
+        elapsed = min(
+            timeit.repeat(
+                lambda fn=fn: (fn(db, args.rows), db.expunge_all()), number=args.repeat, repeat=3
+            )
+        )
+        timings[name] = elapsed / args.repeat
+        print(f"{name:>5}: {timings[name] * 1e6:8.1f} us/page")
+    print(f"speedup: {timings['orm'] / timings['fast']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,36 @@
+# ruff: noqa: E402
+import os
+
+# Keep the app's own engines (and the lifespan's migrations) off ./tasks.db;
+# the fixtures bind each test to a database of its own
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["MIGRATE_ON_STARTUP"] = "false"
+# Cheap password hashes keep the per-test login fast (verify reads the cost from the
+# hash), and hashing in threads spares every test run a pool of worker processes
+os.environ["PASSWORD_SCRYPT_N"] = "16"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+# Write app logs synchronously, so nothing is left on a queue when a test ends
+os.environ["LOG_QUEUE_SIZE"] = "0"
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from app.database import Base, get_db
+from app.cache import count_cache, task_cache, token_cache
+from app.database import Base, get_db, get_read_db, instrument_queries, seed_demo_user
 from app.main import app
 from app.rate_limit import limiter
 
 SQLALCHEMY_DATABASE_URL = "sqlite://"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+engine = instrument_queries(
+    create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -21,6 +38,7 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 @pytest.fixture
 def db_session():
     Base.metadata.create_all(bind=engine)
+    seed_demo_user(engine)
     session = TestingSessionLocal()
     try:
         yield session
@@ -38,7 +56,11 @@ def client(db_session):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     limiter.reset()  # Reset rate limiter for each test
+    task_cache.clear()
+    token_cache.clear()
+    count_cache.clear()
     test_client = TestClient(app)
     # Get auth token
     response = test_client.post(
@@ -59,6 +81,9 @@ def unauthenticated_client(db_session):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     limiter.reset()  # Reset rate limiter for each test
+    task_cache.clear()
+    token_cache.clear()
     yield TestClient(app)
     app.dependency_overrides.clear()
@@ -0,0 +1,98 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.cache import task_cache, token_cache
+from app.database import Base, async_database_url, get_db, get_read_db, seed_demo_user
+from app.main import app
+from app.rate_limit import limiter
+
+
+@pytest.fixture
+def async_client(tmp_path):
+    url = f"sqlite:///{tmp_path / 'tasks.db'}"
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(bind=sync_engine)
+    seed_demo_user(sync_engine)
+    sync_engine.dispose()
+
+    async_engine = create_async_engine(async_database_url(url), poolclass=NullPool)
+    AsyncTestingSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+    sessions = []
+
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as db:
+            sessions.append(db)
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    limiter.reset()
+    task_cache.clear()
+    token_cache.clear()
+    with TestClient(app) as test_client:
+        response = test_client.post(
+            "/api/v1/login", json={"username": "admin", "password": "admin"}
+        )
+        test_client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        yield test_client
+        assert sessions and all(isinstance(db, AsyncSession) for db in sessions)
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize(
+    ("url", "expected"),
+    [
+        ("sqlite:///./tasks.db", "sqlite+aiosqlite:///./tasks.db"),
+        ("postgresql://u:p@db/tasks", "postgresql+asyncpg://u:p@db/tasks"),
+        ("postgresql+psycopg2://u:p@db/tasks", "postgresql+asyncpg://u:p@db/tasks"),
+        ("sqlite+aiosqlite://", "sqlite+aiosqlite://"),
+    ],
+)
+def test_async_database_url(url, expected):
+    assert async_database_url(url) == expected
+
+
+class TestAsyncSession:
+    def test_health_check(self, async_client):
+        response = async_client.get("/health")
+        assert response.status_code == 200
+        assert response.json()["database"] == "connected"
+
+    def test_task_lifecycle(self, async_client):
+        task_id = async_client.post("/api/v1/tasks", json={"title": "Async task"}).json()["id"]
+        assert async_client.get(f"/api/v1/tasks/{task_id}").json()["title"] == "Async task"
+
+        response = async_client.put(f"/api/v1/tasks/{task_id}", json={"status": "completed"})
+        assert response.json()["status"] == "completed"
+
+        response = async_client.get("/api/v1/tasks?search=async&status=completed")
+        assert [task["id"] for task in response.json()] == [task_id]
+
+        assert async_client.delete(f"/api/v1/tasks/{task_id}").status_code == 204
+        assert async_client.get(f"/api/v1/tasks/{task_id}").status_code == 404
+
+    def test_export(self, async_client):
+        async_client.post("/api/v1/tasks:batch", json=[{"title": "One"}, {"title": "Two"}])
+        response = async_client.get("/api/v1/tasks/export")
+        assert response.status_code == 200
+        assert response.content.count(b"\n") == 2
+        response = async_client.get("/api/v1/tasks/export?format=csv&search=two")
+        assert response.text.splitlines()[1].split(",")[1] == "Two"
+
+    def test_import(self, async_client):
+        body = b'{"title": "One"}\n{"title": "Two"}\n{"status": "pending"}\n'
+        data = async_client.post("/api/v1/tasks/import", content=body).json()
+        assert (data["imported"], data["failed"]) == (2, 1)
+        response = async_client.get("/api/v1/tasks?search=two")
+        assert [task["title"] for task in response.json()] == ["Two"]
+
+    def test_batch_create(self, async_client):
+        response = async_client.post(
+            "/api/v1/tasks:batch", json=[{"title": "One"}, {"title": "Two"}]
+        )
+        assert [task["title"] for task in response.json()] == ["One", "Two"]
@@ -0,0 +1,65 @@
+from prometheus_client import REGISTRY
+
+from app import cache
+from app.cache import LRUCache
+
+
+def sample(name, cache_name):
+    return REGISTRY.get_sample_value(f"cache_{name}_total", {"cache": cache_name}) or 0
+
+
+class TestLRUCache:
+    def test_hit_and_miss(self):
+        lru = LRUCache("test-hit", maxsize=2, ttl=60)
+        lru.set(1, "one")
+        assert lru.get(1) == "one"
+        assert lru.get(2) is None
+        assert sample("hits", "test-hit") == 1
+        assert sample("misses", "test-hit") == 1
+
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache("test-evict", maxsize=2, ttl=60)
+        lru.set(1, "one")
+        lru.set(2, "two")
+        lru.get(1)
+        lru.set(3, "three")
+        assert lru.get(2) is None
+        assert lru.get(1) == "one"
+        assert lru.get(3) == "three"
+        assert sample("evictions", "test-evict") == 1
+
+    def test_entries_expire(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+        lru = LRUCache("test-ttl", maxsize=2, ttl=5)
+        lru.set(1, "one")
+        lru.set(2, "two", ttl=60)
+        now[0] += 10
+        assert lru.get(1) is None
+        assert lru.get(2) == "two"
+        assert len(lru) == 1
+
+    def test_fill_does_not_replace_write(self):
+        lru = LRUCache("test-fill", maxsize=2, ttl=60)
+        lru.fill(1, "read")
+        assert lru.get(1) == "read"
+        lru.set(2, "written")
+        lru.fill(2, "stale")
+        assert lru.get(2) == "written"
+
+    def test_fill_does_not_restore_popped_entry(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+        lru = LRUCache("test-fill-pop", maxsize=2, ttl=5)
+        lru.set(1, "one")
+        lru.pop(1)
+        lru.fill(1, "stale")
+        assert lru.get(1) is None
+        now[0] += 10
+        lru.fill(1, "again")
+        assert lru.get(1) == "again"
+
+    def test_zero_size_disables(self):
+        lru = LRUCache("test-disabled", maxsize=0, ttl=60)
+        lru.set(1, "one")
+        assert lru.get(1) is None
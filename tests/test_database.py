@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.exc import OperationalError
+
+from app.database import Base, TaskDB, create_engines, settings
+
+
+@pytest.fixture
+def engines(tmp_path):
+    writer, reader = create_engines(f"sqlite:///{tmp_path / 'tasks.db'}", create_engine)
+    Base.metadata.create_all(bind=writer)
+    yield writer, reader
+    writer.dispose()
+    reader.dispose()
+
+
+class TestSQLiteTuning:
+    def test_writer_pragmas(self, engines):
+        writer, _ = engines
+        with writer.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+            assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2  # MEMORY
+            assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 0
+
+    def test_writer_is_a_single_connection(self, engines):
+        writer, reader = engines
+        assert writer.pool.size() == 1
+        assert reader.pool.size() == 8
+
+    def test_reader_is_read_only(self, engines):
+        _, reader = engines
+        with reader.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 1
+            assert conn.execute(text("SELECT count(*) FROM tasks")).scalar() == 0
+            with pytest.raises(OperationalError):
+                conn.execute(insert(TaskDB.__table__).values(title="Nope", status="pending"))
+
+    def test_concurrent_writes_do_not_lock(self, engines):
+        writer, reader = engines
+
+        def write(worker):
+            for i in range(20):
+                with writer.begin() as conn:
+                    conn.execute(
+                        insert(TaskDB.__table__).values(title=f"{worker}-{i}", status="pending")
+                    )
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(write, range(8)))
+
+        with reader.connect() as conn:
+            assert conn.execute(text("SELECT count(*) FROM tasks")).scalar() == 160
+
+    def test_memory_database_shares_one_engine(self):
+        writer, reader = create_engines("sqlite://", create_engine)
+        assert writer is reader
+
+
+class TestPoolSettings:
+    def test_pool_settings_apply(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "sqlite_tuning", False)
+        monkeypatch.setattr(settings, "db_pool_size", 3)
+        monkeypatch.setattr(settings, "db_pool_timeout", 2.5)
+        writer, reader = create_engines(f"sqlite:///{tmp_path / 'tasks.db'}", create_engine)
+        assert writer is reader
+        assert writer.pool.size() == 3
+        assert writer.pool.timeout() == 2.5
+
+    def test_read_url_gets_its_own_engine(self, tmp_path):
+        primary = f"sqlite:///{tmp_path / 'primary.db'}"
+        replica = f"sqlite:///{tmp_path / 'replica.db'}"
+        writer, reader = create_engines(primary, create_engine, read_url=replica)
+        assert writer.url.database.endswith("primary.db")
+        assert reader.url.database.endswith("replica.db")
+        with reader.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 1
+
+    def test_checkout_wait_is_recorded(self, engines):
+        _, reader = engines
+
+        def checkouts():
+            count = REGISTRY.get_sample_value(
+                "db_pool_checkout_wait_seconds_count", {"engine": "read"}
+            )
+            return count or 0
+
+        before = checkouts()
+        with reader.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        assert checkouts() == before + 1
@@ -0,0 +1,35 @@
+import asyncio
+
+from app.imports import iter_csv_records, iter_lines
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _collect(records):
+    return [record async for batch in records for record in batch]
+
+
+def collect(records):
+    return asyncio.run(_collect(records))
+
+
+def test_lines_split_across_chunks():
+    lines = collect(iter_lines(_chunks(b"on", b"e\ntw", b"o\r", b"\n", b"three")))
+    assert lines == [(1, b"one"), (2, b"two"), (3, b"three")]
+
+
+def test_blank_lines_keep_numbering():
+    assert collect(iter_lines(_chunks(b"a\n\nb\n"))) == [(1, b"a"), (2, b""), (3, b"b")]
+
+
+def test_csv_records_join_quoted_newlines():
+    records = collect(iter_csv_records(_chunks(b'h\n"a\n', b'b ""c""\nd"\nz\n')))
+    assert records == [(1, b"h"), (2, b'"a\nb ""c""\nd"'), (5, b"z")]
+
+
+def test_long_lines_are_cut_while_buffering():
+    lines = collect(iter_lines(_chunks(b"abc", b"defgh", b"ij\nok"), max_length=4))
+    assert lines == [(1, b"abcde"), (2, b"ok")]
@@ -0,0 +1,101 @@
+import io
+import json
+import logging
+import queue
+import sys
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.config import get_settings
+from app.logging_config import (
+    AccessLogSampler,
+    DroppingQueueHandler,
+    request_id_var,
+    setup_logging,
+    stop_log_listener,
+)
+
+
+def access_record(status_code):
+    record = logging.LogRecord("app.access", logging.INFO, __file__, 1, "GET / %d", (200,), None)
+    record.status_code = status_code
+    return record
+
+
+@pytest.fixture
+def restore_logging():
+    yield
+    settings = get_settings()
+    setup_logging(
+        settings.debug,
+        queue_size=settings.log_queue_size,
+        access_log_sample_rate=settings.access_log_sample_rate,
+    )
+
+
+class TestAccessLogSampler:
+    def test_keeps_errors_and_drops_successes_at_zero(self):
+        sampler = AccessLogSampler(0)
+        assert not sampler.filter(access_record(200))
+        assert sampler.filter(access_record(404))
+        assert sampler.filter(access_record(500))
+
+    def test_keeps_a_fraction_of_successes(self):
+        sampler = AccessLogSampler(0.1)
+        kept = sum(sampler.filter(access_record(200)) for _ in range(10000))
+        assert 700 < kept < 1300
+
+
+class TestQueueLogging:
+    def test_drops_and_counts_when_full(self):
+        before = REGISTRY.get_sample_value("log_records_dropped_total") or 0
+        handler = DroppingQueueHandler(queue.Queue(1))
+        handler.handle(access_record(200))
+        handler.handle(access_record(200))
+        assert handler.queue.qsize() == 1
+        assert REGISTRY.get_sample_value("log_records_dropped_total") == before + 1
+
+    def test_prepare_merges_args_and_keeps_exc_info(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.LogRecord("x", logging.ERROR, __file__, 1, "n=%d", (1,), None)
+            record.exc_info = sys.exc_info()
+        prepared = DroppingQueueHandler(queue.Queue()).prepare(record)
+        assert (prepared.msg, prepared.args) == ("n=1", None)
+        assert prepared.exc_info is record.exc_info
+
+    def test_writes_json_on_background_thread(self, capsys, restore_logging):
+        setup_logging(queue_size=100, access_log_sample_rate=0)
+        token = request_id_var.set("req-9")
+        try:
+            logging.getLogger("app.access").info("skipped", extra={"status_code": 200})
+            logging.getLogger("app.access").info("kept", extra={"status_code": 503})
+            logging.getLogger("app.test").warning("hello %s", "world")
+        finally:
+            request_id_var.reset(token)
+        stop_log_listener()
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [line["message"] for line in lines] == ["kept", "hello world"]
+        assert all(line["request_id"] == "req-9" for line in lines)
+
+    def test_logs_directly_once_stopped(self, capsys, restore_logging):
+        setup_logging(queue_size=100)
+        stop_log_listener()
+        token = request_id_var.set("req-10")
+        try:
+            logging.getLogger("app.test").warning("after shutdown")
+        finally:
+            request_id_var.reset(token)
+        (line,) = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert (line["message"], line["request_id"]) == ("after shutdown", "req-10")
+
+    def test_writes_to_the_current_stdout(self, monkeypatch, restore_logging):
+        first, second = io.StringIO(), io.StringIO()
+        monkeypatch.setattr(sys, "stdout", first)
+        setup_logging()
+        first.close()
+        monkeypatch.setattr(sys, "stdout", second)
+        logging.getLogger("app.test").warning("still writing")
+        assert "still writing" in second.getvalue()
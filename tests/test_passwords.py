@@ -0,0 +1,121 @@
+import asyncio
+import io
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import manage, passwords
+from app.auth import create_access_token
+from app.config import get_settings
+from app.database import Base, UserDB, create_engines, get_db, get_read_db, seed_demo_user
+from app.main import app
+from app.rate_limit import limiter
+from tests.conftest import TestingSessionLocal
+
+settings = get_settings()
+
+
+class TestPasswordHashing:
+    def test_round_trip_with_unique_salts(self):
+        first, second = passwords.hash_password("s3cret"), passwords.hash_password("s3cret")
+        assert first != second
+        assert first.startswith(f"scrypt${settings.password_scrypt_n}$")
+        assert passwords.verify_password("s3cret", first)
+        assert not passwords.verify_password("wrong", first)
+
+    @pytest.mark.parametrize("hashed", ["", "plain", "scrypt$x$8$1$AA$AA", "bcrypt$1$2$3$4$5"])
+    def test_malformed_hashes_never_verify(self, hashed):
+        assert not passwords.verify_password("s3cret", hashed)
+
+    def test_needs_rehash_when_cost_changes(self, monkeypatch):
+        hashed = passwords.hash_password("s3cret")
+        assert not passwords.needs_rehash(hashed)
+        monkeypatch.setattr(settings, "password_scrypt_n", settings.password_scrypt_n * 2)
+        assert passwords.needs_rehash(hashed)
+        # Old hashes still verify; they are only upgraded on the next login
+        assert passwords.verify_password("s3cret", hashed)
+
+
+class TestLogin:
+    def test_unknown_user(self, unauthenticated_client):
+        response = unauthenticated_client.post(
+            "/api/v1/login", json={"username": "nobody", "password": "admin"}
+        )
+        assert response.status_code == 401
+
+    def test_login_upgrades_hash_parameters(self, unauthenticated_client, db_session, monkeypatch):
+        monkeypatch.setattr(settings, "password_scrypt_n", 32)
+        response = unauthenticated_client.post(
+            "/api/v1/login", json={"username": "admin", "password": "admin"}
+        )
+        assert response.status_code == 200
+        db_session.expire_all()
+        user = db_session.query(UserDB).filter_by(username="admin").one()
+        assert user.hashed_password.startswith("scrypt$32$")
+        assert passwords.verify_password("admin", user.hashed_password)
+
+    def test_login_holds_no_connection_while_hashing(self, tmp_path, monkeypatch):
+        # A tuned SQLite file: one writer connection, shared by every write request
+        writer, reader = create_engines(f"sqlite:///{tmp_path / 'tasks.db'}", create_engine)
+        Base.metadata.create_all(bind=writer)
+        seed_demo_user(writer)
+
+        def sessions(bind):
+            factory = sessionmaker(bind=bind, autoflush=False)
+
+            def get():
+                with factory() as db:
+                    yield db
+
+            return get
+
+        hashing, release = asyncio.Event(), asyncio.Event()
+        verify = passwords.verify_password_async
+
+        async def slow_verify(password, hashed):
+            hashing.set()
+            await release.wait()
+            return await verify(password, hashed)
+
+        monkeypatch.setattr(passwords, "verify_password_async", slow_verify)
+        monkeypatch.setitem(app.dependency_overrides, get_db, sessions(writer))
+        monkeypatch.setitem(app.dependency_overrides, get_read_db, sessions(reader))
+        limiter.reset()
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                credentials = {"username": "admin", "password": "admin"}
+                login = asyncio.create_task(client.post("/api/v1/login", json=credentials))
+                await hashing.wait()
+                try:
+                    created = await asyncio.wait_for(
+                        client.post("/api/v1/tasks", json={"title": "A"}, headers=headers), 5
+                    )
+                finally:
+                    release.set()
+                return created, await login
+
+        try:
+            created, login = asyncio.run(scenario())
+        finally:
+            writer.dispose()
+            reader.dispose()
+        assert created.status_code == 201
+        assert login.status_code == 200
+
+
+class TestCreateUserCommand:
+    def test_create_user(self, db_session, monkeypatch):
+        monkeypatch.setattr(manage, "SessionLocal", TestingSessionLocal)
+        monkeypatch.setattr(manage, "migrate", lambda bind: None)
+        monkeypatch.setattr("sys.stdin", io.StringIO("hunter22\n"))
+        assert manage.main(["create-user", "alice", "--password-stdin"]) == 0
+        user = db_session.query(UserDB).filter_by(username="alice").one()
+        assert passwords.verify_password("hunter22", user.hashed_password)
+
+        monkeypatch.setattr("sys.stdin", io.StringIO("other\n"))
+        assert manage.main(["create-user", "alice", "--password-stdin"]) == 1
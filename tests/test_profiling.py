@@ -0,0 +1,146 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from app import profiling
+from app.auth import create_access_token
+from app.routers.debug import settings
+
+
+def busy_loop(stopping: threading.Event) -> None:
+    while not stopping.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def busy_thread():
+    stopping = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stopping,), name="busy")
+    thread.start()
+    yield thread
+    stopping.set()
+    thread.join()
+
+
+@pytest.fixture
+def profiling_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "profiling_enabled", True)
+
+
+class TestProfile:
+    def test_collapsed_stacks_name_the_sampled_functions(self, busy_thread):
+        result = asyncio.run(profiling.profile(0.2, interval=0.005))
+        lines = result.collapsed().splitlines()
+        busy = [line for line in lines if line.startswith("thread:busy;")]
+        assert busy
+        assert any("test_profiling:busy_loop" in line for line in busy)
+        stack, count = busy[0].rsplit(" ", 1)
+        assert int(count) > 0
+
+    def test_speedscope_profile_indexes_shared_frames(self, busy_thread):
+        result = asyncio.run(profiling.profile(0.1, interval=0.005))
+        document = result.speedscope("test")
+        (sampled,) = document["profiles"]
+        frames = document["shared"]["frames"]
+        assert len(sampled["samples"]) == len(sampled["weights"]) == len(result.counts)
+        assert all(0 <= i < len(frames) for sample in sampled["samples"] for i in sample)
+        assert sampled["endValue"] == pytest.approx(result.duration)
+
+    def test_sampler_requires_record(self):
+        with pytest.raises(TypeError):
+            profiling.Sampler(0.01)
+
+    def test_only_one_profile_runs_at_a_time(self):
+        with profiling._profile_lock, pytest.raises(RuntimeError):
+            asyncio.run(profiling.profile(0.01, interval=0.005))
+
+    def test_cpu_profile_skips_idle_threads(self, busy_thread):
+        idle = threading.Event()
+        sleeper = threading.Thread(target=idle.wait, name="idle")
+        sleeper.start()
+        try:
+            result = asyncio.run(profiling.profile(0.3, interval=0.005, cpu_only=True))
+        finally:
+            idle.set()
+            sleeper.join()
+        threads = {stack[0][0] for stack in result.counts}
+        assert "thread:idle" not in threads
+
+
+class TestProfileEndpoint:
+    def test_disabled_by_default(self, client):
+        response = client.get("/debug/profile", params={"seconds": 0.05})
+        assert response.status_code == 404
+
+    def test_requires_an_admin(self, client, profiling_enabled):
+        token = create_access_token({"sub": "someone"})
+        response = client.get(
+            "/debug/profile",
+            params={"seconds": 0.05},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == 403
+
+    def test_collapsed(self, client, profiling_enabled):
+        response = client.get("/debug/profile", params={"seconds": 0.05, "interval_ms": 5})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "thread:MainThread" in response.text
+
+    def test_speedscope(self, client, profiling_enabled):
+        response = client.get(
+            "/debug/profile", params={"seconds": 0.05, "format": "speedscope", "mode": "cpu"}
+        )
+        assert response.status_code == 200
+        assert "speedscope.json" in response.headers["content-disposition"]
+        assert response.json()["profiles"][0]["type"] == "sampled"
+
+    def test_seconds_are_bounded(self, client, profiling_enabled):
+        assert client.get("/debug/profile", params={"seconds": 61}).status_code == 422
+
+
+class TestSlowRequestProfiler:
+    def test_slowest_requests_are_saved_with_route_and_request_id(self, tmp_path, busy_thread):
+        profiler = profiling.SlowRequestProfiler(
+            percent=10, interval=0.005, directory=str(tmp_path), keep=100
+        )
+        profiler.start()
+        try:
+            for _ in range(profiler.REFRESH):
+                profiler.finished(time.perf_counter(), 0.001, "/fast", "fast-id")
+            assert profiler.threshold == 0.001
+            started = time.perf_counter()
+            time.sleep(0.1)
+            profiler.finished(started, time.perf_counter() - started, "/slow", "slow-id")
+            time.sleep(0.1)
+        finally:
+            profiler.stop()
+
+        (path,) = tmp_path.iterdir()
+        assert path.name.endswith("-slow-id.speedscope.json")
+        document = json.loads(path.read_text())
+        assert document["name"].startswith("/slow slow-id ")
+        assert document["profiles"][0]["samples"]
+
+    def test_old_profiles_are_pruned(self, tmp_path):
+        profiler = profiling.SlowRequestProfiler(
+            percent=10, interval=0.005, directory=str(tmp_path), keep=2
+        )
+        for i in range(4):
+            profiler.save(float(i), float(i) + 0.1, "/slow", f"id{i}")
+            time.sleep(0.002)
+        assert len(list(tmp_path.iterdir())) == 2
+
+    def test_middleware_reports_requests(self, client, monkeypatch):
+        reported = []
+
+        class Recorder:
+            def finished(self, started, duration, route, request_id):
+                reported.append((route, request_id))
+
+        monkeypatch.setattr(profiling, "slow_requests", Recorder())
+        client.get("/api/v1/tasks/1", headers={"X-Request-ID": "abc"})
+        assert reported == [("/api/v1/tasks/{task_id}", "abc")]
@@ -0,0 +1,77 @@
+import logging
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.database import QueryStats, instrument_queries, parameter_shape, query_stats_var, settings
+
+
+@pytest.fixture
+def stats():
+    stats = QueryStats()
+    token = query_stats_var.set(stats)
+    yield stats
+    query_stats_var.reset(token)
+
+
+@pytest.fixture
+def engine():
+    engine = instrument_queries(create_engine("sqlite://"))
+    yield engine
+    engine.dispose()
+
+
+def test_statements_are_counted_and_timed(engine, stats):
+    with engine.connect() as conn:
+        for _ in range(3):
+            conn.execute(text("SELECT 1"))
+    assert stats.count == 3
+    assert stats.seconds > 0
+    assert stats.most_repeated() == ("SELECT 1", 3)
+
+
+def test_statements_outside_a_request_are_not_counted(engine):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert query_stats_var.get() is None
+
+
+def test_slow_queries_are_logged_with_parameter_shape(engine, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "sql_slow_query_ms", 0)
+    with caplog.at_level(logging.WARNING, logger="app.sql"), engine.connect() as conn:
+        conn.execute(text("SELECT :name,\n  :age"), {"name": "secret", "age": 42})
+    (record,) = caplog.records
+    assert "SELECT ?, ?" in record.getMessage()
+    assert record.parameters == "(str, int)"
+    assert "secret" not in record.getMessage()
+
+
+@pytest.mark.parametrize(
+    ("parameters", "executemany", "shape"),
+    [
+        ({"a": 1, "b": "x"}, False, "{a: int, b: str}"),
+        ((1, None), False, "(int, NoneType)"),
+        ([(1,), (2,)], True, "2 x (int)"),
+        ([], True, "0 x ()"),
+    ],
+)
+def test_parameter_shape(parameters, executemany, shape):
+    assert parameter_shape(parameters, executemany) == shape
+
+
+class TestRequestStats:
+    def test_access_log_carries_query_stats(self, client, caplog):
+        with caplog.at_level(logging.INFO, logger="app.access"):
+            client.get("/api/v1/tasks")
+        (record,) = [r for r in caplog.records if r.name == "app.access"]
+        assert record.db_queries >= 1
+        assert record.db_time_ms > 0
+
+    def test_many_statements_warn(self, client, monkeypatch, caplog):
+        client.post("/api/v1/tasks/batch", json=[{"title": "a"}])
+        monkeypatch.setattr(settings, "sql_statements_warn", 0)
+        with caplog.at_level(logging.WARNING, logger="app.access"):
+            client.get("/api/v1/tasks")
+        (record,) = [r for r in caplog.records if r.levelno == logging.WARNING]
+        assert record.route == "/api/v1/tasks"
+        assert "SQL statements" in record.getMessage()
@@ -0,0 +1,173 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.main import app
+from app.middleware import RateLimitMiddleware
+from app.rate_limit import (
+    SWEEP_INTERVAL_SECONDS,
+    Limiter,
+    MemoryStorage,
+    Rate,
+    SQLiteStorage,
+    limiter,
+)
+from app.routers import v1
+
+
+class TestRate:
+    @pytest.mark.parametrize(
+        "text,limit,period",
+        [("100/minute", 100, 60), ("10 per second", 10, 1), ("5/10 minutes", 5, 600)],
+    )
+    def test_parse(self, text, limit, period):
+        rate = Rate.parse(text)
+        assert (rate.limit, rate.period) == (limit, period)
+
+    @pytest.mark.parametrize("text", ["", "ten/minute", "0/minute", "5/fortnight"])
+    def test_parse_invalid(self, text):
+        with pytest.raises(ValueError):
+            Rate.parse(text)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def storage(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStorage()
+    return SQLiteStorage(str(tmp_path / "ratelimit.db"))
+
+
+class TestStorage:
+    def test_allows_burst_then_paces(self, storage):
+        rate = Rate.parse("3/minute")
+        assert [storage.acquire("k", rate, 1000.0) for _ in range(3)] == [0, 0, 0]
+        assert storage.acquire("k", rate, 1000.0) == pytest.approx(20)
+        # One request is earned back every 20 seconds
+        assert storage.acquire("k", rate, 1019.0) > 0
+        assert storage.acquire("k", rate, 1020.0) == 0
+        assert storage.acquire("k", rate, 1020.0) > 0
+
+    def test_keys_are_independent(self, storage):
+        rate = Rate.parse("1/minute")
+        assert storage.acquire("a", rate, 1000.0) == 0
+        assert storage.acquire("a", rate, 1000.0) > 0
+        assert storage.acquire("b", rate, 1000.0) == 0
+
+    def test_reset(self, storage):
+        rate = Rate.parse("1/minute")
+        storage.acquire("k", rate, 1000.0)
+        storage.reset()
+        assert storage.acquire("k", rate, 1000.0) == 0
+
+
+def test_memory_storage_expires_recovered_keys():
+    storage = MemoryStorage()
+    rate = Rate.parse("1/second")
+    storage.acquire("a", rate, 1000.0)
+    storage.acquire("b", rate, 1000.0 + SWEEP_INTERVAL_SECONDS)
+    assert len(storage) == 1
+
+
+def test_sqlite_storage_is_shared(tmp_path):
+    # Two storages on one file behave like two worker processes
+    path = str(tmp_path / "ratelimit.db")
+    first, second = SQLiteStorage(path), SQLiteStorage(path)
+    rate = Rate.parse("2/minute")
+    assert first.acquire("k", rate, 1000.0) == 0
+    assert second.acquire("k", rate, 1000.0) == 0
+    assert first.acquire("k", rate, 1000.0) > 0
+    assert second.acquire("k", rate, 1000.0) > 0
+
+
+def test_sqlite_storage_runs_off_the_event_loop(tmp_path, monkeypatch):
+    storage = SQLiteStorage(str(tmp_path / "ratelimit.db"))
+    threads = []
+    real_acquire = storage.acquire
+
+    def recording_acquire(*args):
+        threads.append(threading.get_ident())
+        return real_acquire(*args)
+
+    monkeypatch.setattr(storage, "acquire", recording_acquire)
+
+    async def hit():
+        return await Limiter(storage).hit("k", Rate.parse("1/minute")), threading.get_ident()
+
+    wait, loop_thread = asyncio.run(hit())
+    assert wait == 0
+    assert threads and threads[0] != loop_thread
+
+
+class TestRateLimitMiddleware:
+    def test_resolves_each_path_once(self, monkeypatch):
+        middleware = RateLimitMiddleware(app.router, limiter, v1.router.routes)
+        calls = []
+        real_limited_routes = middleware._limited_routes
+
+        def counting_limited_routes():
+            calls.append(1)
+            return real_limited_routes()
+
+        monkeypatch.setattr(middleware, "_limited_routes", counting_limited_routes)
+        scope = {"type": "http", "method": "POST", "path": "/api/v1/login", "root_path": ""}
+        assert middleware._resolve(scope) == middleware._resolve(scope)
+        assert middleware._resolve(scope)[0] == "/api/v1/login"
+        assert middleware._resolve({**scope, "path": "/health"}) is None
+        assert len(calls) == 2
+
+    def test_login_is_limited(self, unauthenticated_client):
+        credentials = {"username": "admin", "password": "wrong"}
+        for _ in range(10):
+            response = unauthenticated_client.post("/api/v1/login", json=credentials)
+            assert response.status_code == 401
+        response = unauthenticated_client.post("/api/v1/login", json=credentials)
+        assert response.status_code == 429
+        assert response.json()["error"] == "rate_limit_exceeded"
+        assert int(response.headers["Retry-After"]) >= 1
+        assert "X-Request-ID" in response.headers
+
+    def test_limits_are_per_route(self, unauthenticated_client):
+        for _ in range(11):
+            unauthenticated_client.post("/api/v1/login", json={"username": "a", "password": "b"})
+        response = unauthenticated_client.post("/api/v1/refresh", json={"refresh_token": "x"})
+        assert response.status_code == 401
+
+    def test_endpoints_sharing_a_path_are_limited_apart(self):
+        rate_limits = Limiter(MemoryStorage())
+        rate = Rate.parse("2/minute")
+        rate_limits.rates = {endpoint: rate for endpoint in limiter.rates}
+        passed = []
+
+        async def endpoint_app(scope, receive, send):
+            passed.append(scope["method"])
+
+        middleware = RateLimitMiddleware(endpoint_app, rate_limits, v1.router.routes)
+
+        async def request(method):
+            statuses = []
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+
+            scope = {
+                "type": "http",
+                "method": method,
+                "path": "/api/v1/tasks",
+                "root_path": "",
+                "client": ("10.0.0.1", 1234),
+                "headers": [],
+            }
+            await middleware(scope, None, send)
+            return statuses[0] if statuses else 200
+
+        async def run():
+            return [await request(method) for method in ("POST", "POST", "POST", "GET", "GET")]
+
+        assert asyncio.run(run()) == [200, 200, 429, 200, 200]
+        assert passed == ["POST", "POST", "GET", "GET"]
+
+    def test_unlimited_routes_pass_through(self, unauthenticated_client):
+        for _ in range(20):
+            assert unauthenticated_client.get("/health").status_code == 200
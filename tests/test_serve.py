@@ -0,0 +1,45 @@
+import argparse
+import os
+
+from app import serve
+from app.config import Settings
+
+
+def test_server_options():
+    settings = Settings(server_backlog=100, server_keepalive_timeout=7, server_graceful_timeout=9)
+    args = argparse.Namespace(host="0.0.0.0", port=9000, workers=3)
+    options = serve.server_options(args, settings)
+    assert options["workers"] == 3
+    assert options["backlog"] == 100
+    assert options["timeout_keep_alive"] == 7
+    assert options["timeout_graceful_shutdown"] == 9
+    assert options["access_log"] is False
+
+
+def test_workers_default_to_available_cpus(monkeypatch):
+    monkeypatch.setattr(serve.os, "cpu_count", lambda: 64)
+    monkeypatch.setattr(serve.os, "sched_getaffinity", lambda pid: {0, 1, 2}, raising=False)
+    assert serve.worker_count(0) == 3
+    assert serve.worker_count(2) == 2
+
+
+def test_workers_fall_back_to_cpu_count(monkeypatch):
+    monkeypatch.setattr(serve.os, "cpu_count", lambda: 4)
+    monkeypatch.delattr(serve.os, "sched_getaffinity", raising=False)
+    assert serve.worker_count(0) == 4
+
+
+def test_schema_is_created_once_before_workers(monkeypatch):
+    settings = Settings(migrate_on_startup=True)
+    calls = []
+    monkeypatch.setattr(serve, "get_settings", lambda: settings)
+    monkeypatch.setattr(serve, "setup_logging", lambda debug: None)
+    monkeypatch.setattr(serve, "migrate", lambda bind: calls.append("migrate"))
+    monkeypatch.setattr(serve.uvicorn, "run", lambda app, **options: calls.append(app))
+    monkeypatch.delenv("MIGRATE_ON_STARTUP", raising=False)
+
+    serve.main(["--workers", "2"])
+
+    assert calls == ["migrate", "app.main:app"]
+    assert os.environ.pop("MIGRATE_ON_STARTUP") == "false"
+    assert settings.migrate_on_startup is False
@@ -0,0 +1,68 @@
+import logging
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base
+from app.main import app
+from app.migrations import upgrade_schema
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Generous for slow CI machines; importing app.main takes about 0.9s on one core
+IMPORT_BUDGET_SECONDS = 2.5
+
+
+def test_import_does_no_database_work_and_fits_budget(tmp_path):
+    database = tmp_path / "tasks.db"
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        env={**os.environ, "DATABASE_URL": f"sqlite:///{database}"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert float(result.stdout.splitlines()[-1]) < IMPORT_BUDGET_SECONDS
+    assert not database.exists()
+
+
+class TestUpgradeSchema:
+    def test_fresh_database_is_migrated_to_head(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+        assert upgrade_schema(engine) == "upgraded"
+        assert {"tasks", "users", "tasks_fts"} <= set(inspect(engine).get_table_names())
+        assert upgrade_schema(engine) == "current"
+
+    def test_unversioned_database_is_adopted(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        Base.metadata.tables["tasks"].create(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO tasks (title, status, created_at, updated_at) "
+                    "VALUES ('Old', 'pending', '2024-01-01', '2024-01-01')"
+                )
+            )
+            # Created by the create_all of the time, before any migration ran
+            conn.execute(text("CREATE INDEX ix_tasks_id ON tasks (id)"))
+        assert upgrade_schema(engine) == "adopted"
+        indexes = {index["name"] for index in inspect(engine).get_indexes("tasks")}
+        assert "ix_tasks_id" not in indexes
+        assert "ix_tasks_status_id" in indexes
+        with engine.connect() as conn:
+            matches = conn.execute(text("SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH 'Old'"))
+            assert matches.all() == [(1,)]
+        assert upgrade_schema(engine) == "current"
+
+
+def test_lifespan_logs_startup_phases(caplog):
+    with caplog.at_level(logging.INFO, logger="app.main"), TestClient(app):
+        pass
+    (record,) = [r for r in caplog.records if r.getMessage().startswith("Startup complete")]
+    assert {"import", "warm_pools"} <= set(record.startup_ms)
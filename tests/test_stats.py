@@ -0,0 +1,132 @@
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base, rebuild_task_stats, utc_now
+from app.migrations import alembic_config, upgrade_schema
+from tests.conftest import engine
+
+TODAY = utc_now().date()
+
+
+def stats(client, days=1):
+    response = client.get("/api/v1/tasks/stats", params={"days": days})
+    assert response.status_code == 200
+    return response.json()
+
+
+def counts(client):
+    data = stats(client)
+    (today,) = data["daily"]
+    return data["by_status"], today["created"], today["completed"]
+
+
+class TestTaskStats:
+    def test_empty(self, client):
+        data = stats(client, days=3)
+        assert data["total"] == 0
+        assert data["by_status"] == {"pending": 0, "in_progress": 0, "completed": 0}
+        assert [day["day"] for day in data["daily"]] == [
+            str(TODAY - timedelta(days=2)),
+            str(TODAY - timedelta(days=1)),
+            str(TODAY),
+        ]
+
+    def test_single_writes_keep_counts(self, client):
+        first = client.post("/api/v1/tasks", json={"title": "A"}).json()["id"]
+        client.post("/api/v1/tasks", json={"title": "B", "status": "completed"})
+        assert counts(client) == ({"pending": 1, "in_progress": 0, "completed": 1}, 2, 1)
+
+        client.put(f"/api/v1/tasks/{first}", json={"status": "completed"})
+        assert counts(client) == ({"pending": 0, "in_progress": 0, "completed": 2}, 2, 2)
+
+        # Completing it again, or editing other fields, changes nothing
+        client.put(f"/api/v1/tasks/{first}", json={"status": "completed", "title": "A2"})
+        assert counts(client) == ({"pending": 0, "in_progress": 0, "completed": 2}, 2, 2)
+
+        client.put(f"/api/v1/tasks/{first}", json={"status": "in_progress"})
+        assert counts(client) == ({"pending": 0, "in_progress": 1, "completed": 1}, 2, 1)
+
+        client.delete(f"/api/v1/tasks/{first}")
+        assert counts(client) == ({"pending": 0, "in_progress": 0, "completed": 1}, 1, 1)
+
+    def test_bulk_writes_keep_counts(self, client):
+        created = client.post(
+            "/api/v1/tasks:batch",
+            json=[{"title": "A"}, {"title": "B"}, {"title": "C", "status": "completed"}],
+        ).json()
+        client.patch(
+            "/api/v1/tasks:batch",
+            json=[
+                {"id": created[0]["id"], "status": "completed"},
+                {"id": created[2]["id"], "status": "pending"},
+            ],
+        )
+        assert counts(client) == ({"pending": 2, "in_progress": 0, "completed": 1}, 3, 1)
+
+        body = '{"title": "D", "status": "completed"}\n{"title": "E"}\n'
+        client.post("/api/v1/tasks/import", content=body)
+        assert counts(client) == ({"pending": 3, "in_progress": 0, "completed": 2}, 5, 2)
+
+        client.delete("/api/v1/tasks?status=completed")
+        assert counts(client) == ({"pending": 3, "in_progress": 0, "completed": 0}, 3, 0)
+
+    def test_days_are_bounded(self, client):
+        assert client.get("/api/v1/tasks/stats", params={"days": 0}).status_code == 422
+        assert client.get("/api/v1/tasks/stats", params={"days": 367}).status_code == 422
+
+    def test_rebuild_repairs_counts(self, client):
+        client.post("/api/v1/tasks", json={"title": "A", "status": "completed"})
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE task_status_counts SET count = 42"))
+            conn.execute(text("DELETE FROM task_daily_counts"))
+        with engine.begin() as conn:
+            rebuild_task_stats(conn)
+        assert counts(client) == ({"pending": 0, "in_progress": 0, "completed": 1}, 1, 1)
+
+
+def test_summary_tables_are_sqlite_only():
+    # create_all on other databases must not make tables that nothing maintains
+    assert not {"task_status_counts", "task_daily_counts"} & set(Base.metadata.tables)
+    bind = create_engine("sqlite://")
+    Base.metadata.create_all(bind)
+    assert {"task_status_counts", "task_daily_counts"} <= set(inspect(bind).get_table_names())
+    Base.metadata.drop_all(bind)
+    assert inspect(bind).get_table_names() == []
+
+
+def test_migration_backfills_counts(tmp_path):
+    from alembic.command import upgrade
+
+    bind = create_engine(f"sqlite:///{tmp_path / 'tasks.db'}")
+    with bind.begin() as conn:
+        upgrade(alembic_config(conn), "d71b4c9e0a52")
+        conn.execute(
+            text(
+                "INSERT INTO tasks (title, status, created_at, updated_at) VALUES "
+                "('A', 'completed', '2024-01-01 10:00:00', '2024-01-03 09:00:00'), "
+                "('B', 'pending', '2024-01-01 11:00:00', '2024-01-01 11:00:00')"
+            )
+        )
+    assert upgrade_schema(bind) == "upgraded"
+    with bind.begin() as conn:
+        assert dict(conn.execute(text("SELECT status, count FROM task_status_counts")).all()) == {
+            "completed": 1,
+            "pending": 1,
+        }
+        daily = conn.execute(text("SELECT day, created, completed FROM task_daily_counts"))
+        assert sorted(daily.all()) == [("2024-01-01", 2, 0), ("2024-01-03", 0, 1)]
+        # The migration's triggers keep counting from here on
+        now = datetime(2024, 2, 1, tzinfo=timezone.utc)
+        conn.execute(
+            text(
+                "INSERT INTO tasks (title, status, created_at, updated_at) "
+                "VALUES ('C', 'pending', :now, :now)"
+            ),
+            {"now": now.strftime("%Y-%m-%d %H:%M:%S")},
+        )
+        row = conn.execute(
+            text("SELECT created FROM task_daily_counts WHERE day = :day"),
+            {"day": str(date(2024, 2, 1))},
+        )
+        assert row.scalar_one() == 1
@@ -1,3 +1,27 @@
+import base64
+import csv
+import hashlib
+import io
+import json
+import logging
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from app import auth, crud
+from app.cache import task_cache, token_cache
+from app.database import Base, TaskDB
+from app.models import TaskResponse
+from app.pagination import encode_cursor
+from app.routers.v1 import settings
+from tests.conftest import engine
+
+
 class TestHealth:
     def test_health_check(self, unauthenticated_client):
         response = unauthenticated_client.get("/health")
@@ -7,6 +31,28 @@ class TestHealth:
         assert data["database"] == "connected"
 
 
+class TestRequestLogging:
+    def test_generates_request_id(self, unauthenticated_client):
+        response = unauthenticated_client.get("/health")
+        assert len(response.headers["X-Request-ID"]) == 8
+
+    def test_honors_incoming_request_id(self, unauthenticated_client):
+        response = unauthenticated_client.get("/health", headers={"X-Request-ID": "abc-123.x_y"})
+        assert response.headers["X-Request-ID"] == "abc-123.x_y"
+
+    def test_replaces_unsafe_request_id(self, unauthenticated_client):
+        response = unauthenticated_client.get("/health", headers={"X-Request-ID": "a b\tc"})
+        assert response.headers["X-Request-ID"] != "a b\tc"
+
+    def test_logs_one_line_per_request(self, client, caplog):
+        with caplog.at_level(logging.INFO, logger="app.access"):
+            client.get("/api/v1/tasks/404", headers={"X-Request-ID": "req-1"})
+        [record] = [r for r in caplog.records if r.name == "app.access"]
+        assert (record.method, record.path, record.status_code) == ("GET", "/api/v1/tasks/404", 404)
+        assert record.duration_ms >= 0
+        assert record.request_id == "req-1"
+
+
 class TestAuth:
     def test_login_success(self, unauthenticated_client):
         response = unauthenticated_client.post(
@@ -68,6 +114,35 @@ class TestAuth:
         )
         assert response.status_code == 401
 
+    def test_verified_token_is_cached(self, client, monkeypatch):
+        calls = []
+        real_decode = auth.jwt.decode
+
+        def counting_decode(*args, **kwargs):
+            calls.append(1)
+            return real_decode(*args, **kwargs)
+
+        monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+        assert client.get("/api/v1/tasks").status_code == 200
+        assert client.get("/api/v1/tasks").status_code == 200
+        assert len(calls) == 1
+        assert len(token_cache) == 1
+
+    def test_refresh_token_is_not_cached_as_access(self, unauthenticated_client):
+        login = unauthenticated_client.post(
+            "/api/v1/login", json={"username": "admin", "password": "admin"}
+        ).json()
+        headers = {"Authorization": f"Bearer {login['refresh_token']}"}
+        assert unauthenticated_client.get("/api/v1/tasks", headers=headers).status_code == 401
+        assert len(token_cache) == 0
+
+    def test_cached_token_honors_exp(self, unauthenticated_client):
+        token = auth.create_access_token({"sub": "admin"}, expires_delta=timedelta(seconds=-5))
+        exp = int(time.time()) - 5
+        token_cache.set(hashlib.sha256(token.encode()).digest(), ("admin", exp), ttl=60)
+        headers = {"Authorization": f"Bearer {token}"}
+        assert unauthenticated_client.get("/api/v1/tasks", headers=headers).status_code == 401
+
 
 class TestCreateTask:
     def test_create_task_valid(self, client):
@@ -125,6 +200,14 @@ class TestListTasks:
         assert data[0]["title"] == "Task 1"
         assert data[1]["title"] == "Task 2"
 
+    def test_list_body_matches_default_encoding(self, client):
+        client.post("/api/v1/tasks", json={"title": 'Caf\u00e9 \u2603 "q" \\ </x>\u2028'})
+        client.post("/api/v1/tasks", json={"title": "Tab\tand\nnewline", "description": "d"})
+        response = client.get("/api/v1/tasks")
+        models = [TaskResponse.model_validate(task) for task in response.json()]
+        assert response.headers["content-type"] == "application/json"
+        assert response.content == JSONResponse(jsonable_encoder(models)).body
+
     def test_list_tasks_filter_by_status(self, client):
         client.post("/api/v1/tasks", json={"title": "Pending", "status": "pending"})
         client.post("/api/v1/tasks", json={"title": "Done", "status": "completed"})
@@ -152,6 +235,50 @@ class TestListTasks:
         response = client.get("/api/v1/tasks?limit=101")
         assert response.status_code == 422
 
+    def test_list_tasks_cursor_pagination(self, client):
+        for i in range(5):
+            client.post("/api/v1/tasks", json={"title": f"Task {i}"})
+        response = client.get("/api/v1/tasks?limit=2")
+        assert [task["title"] for task in response.json()] == ["Task 0", "Task 1"]
+        cursor = response.headers["X-Next-Cursor"]
+
+        response = client.get(f"/api/v1/tasks?limit=2&cursor={cursor}")
+        assert [task["title"] for task in response.json()] == ["Task 2", "Task 3"]
+        cursor = response.headers["X-Next-Cursor"]
+
+        response = client.get(f"/api/v1/tasks?limit=2&cursor={cursor}")
+        assert [task["title"] for task in response.json()] == ["Task 4"]
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_list_tasks_cursor_with_status_filter(self, client):
+        for i in range(4):
+            status = "completed" if i % 2 else "pending"
+            client.post("/api/v1/tasks", json={"title": f"Task {i}", "status": status})
+        response = client.get("/api/v1/tasks?status=completed&limit=1")
+        assert [task["title"] for task in response.json()] == ["Task 1"]
+        cursor = response.headers["X-Next-Cursor"]
+        response = client.get(f"/api/v1/tasks?status=completed&limit=1&cursor={cursor}")
+        assert [task["title"] for task in response.json()] == ["Task 3"]
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_list_tasks_invalid_cursor(self, client):
+        response = client.get("/api/v1/tasks?cursor=not-a-cursor")
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
+    @pytest.mark.parametrize("raw", [b" 1_0 ", b"-1", "\u0663".encode(), str(2**63).encode()])
+    def test_list_tasks_cursor_must_be_an_id(self, client, raw):
+        cursor = base64.urlsafe_b64encode(raw).decode()
+        response = client.get(f"/api/v1/tasks?cursor={cursor}")
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
+    def test_list_tasks_cursor_accepts_largest_id(self, client):
+        client.post("/api/v1/tasks", json={"title": "Task"})
+        response = client.get(f"/api/v1/tasks?cursor={encode_cursor(2**63 - 1)}")
+        assert response.status_code == 200
+        assert response.json() == []
+
     def test_list_tasks_search(self, client):
         client.post("/api/v1/tasks", json={"title": "Buy groceries"})
         client.post("/api/v1/tasks", json={"title": "Call mom"})
@@ -162,6 +289,291 @@ class TestListTasks:
         assert len(data) == 2
         assert all("Buy" in task["title"] for task in data)
 
+    def test_list_tasks_search_substring(self, client):
+        client.post("/api/v1/tasks", json={"title": "Repaint the fence"})
+        client.post("/api/v1/tasks", json={"title": "Paint", "description": "Living room"})
+        response = client.get("/api/v1/tasks?search=PAINT")
+        assert [task["title"] for task in response.json()] == ["Repaint the fence", "Paint"]
+
+    def test_list_tasks_search_short_term(self, client):
+        client.post("/api/v1/tasks", json={"title": "Go to gym"})
+        client.post("/api/v1/tasks", json={"title": "Read"})
+        response = client.get("/api/v1/tasks?search=go")
+        assert [task["title"] for task in response.json()] == ["Go to gym"]
+
+    def test_list_tasks_search_fulltext(self, client):
+        client.post("/api/v1/tasks", json={"title": "Groceries", "description": "Buy milk"})
+        client.post("/api/v1/tasks", json={"title": "Call mom"})
+        response = client.get("/api/v1/tasks?search=milk")
+        assert response.json() == []
+        response = client.get("/api/v1/tasks?search=milk&search_mode=fulltext")
+        assert [task["title"] for task in response.json()] == ["Groceries"]
+
+    def test_list_tasks_search_ranked(self, client):
+        client.post("/api/v1/tasks", json={"title": "Report", "description": "Quarterly"})
+        client.post("/api/v1/tasks", json={"title": "Quarterly report draft"})
+        response = client.get("/api/v1/tasks?search=quarterly report&search_mode=fulltext")
+        assert [task["title"] for task in response.json()] == ["Quarterly report draft"]
+        response = client.get("/api/v1/tasks?search=report&search_mode=fulltext&rank=true")
+        assert [task["title"] for task in response.json()] == [
+            "Report",
+            "Quarterly report draft",
+        ]
+
+    def test_list_tasks_search_ranked_ties_page_by_id(self, client):
+        ids = [client.post("/api/v1/tasks", json={"title": "Same"}).json()["id"] for _ in range(4)]
+        query = "/api/v1/tasks?search=same&search_mode=fulltext&rank=true&limit=1"
+        pages = [client.get(f"{query}&skip={skip}").json() for skip in range(4)]
+        assert [task["id"] for page in pages for task in page] == ids
+
+    def test_list_tasks_unrankable_search_pages_by_cursor(self, client):
+        for title in ("ab 1", "ab 2", "ab 3"):
+            client.post("/api/v1/tasks", json={"title": title})
+        response = client.get("/api/v1/tasks?search=ab&rank=true&limit=2")
+        assert [task["title"] for task in response.json()] == ["ab 1", "ab 2"]
+        cursor = response.headers["X-Next-Cursor"]
+        response = client.get(f"/api/v1/tasks?search=ab&rank=true&limit=2&cursor={cursor}")
+        assert response.status_code == 200
+        assert [task["title"] for task in response.json()] == ["ab 3"]
+
+    def test_list_tasks_search_rank_rejects_cursor(self, client):
+        response = client.get("/api/v1/tasks?search=abc&rank=true&cursor=MQ")
+        assert response.status_code == 400
+
+    def test_list_tasks_search_index_follows_writes(self, client):
+        task_id = client.post("/api/v1/tasks", json={"title": "Old title"}).json()["id"]
+        client.put(f"/api/v1/tasks/{task_id}", json={"title": "New title"})
+        assert client.get("/api/v1/tasks?search=old").json() == []
+        assert len(client.get("/api/v1/tasks?search=new").json()) == 1
+        client.delete(f"/api/v1/tasks/{task_id}")
+        assert client.get("/api/v1/tasks?search=new").json() == []
+
+
+class TestListTotal:
+    def test_total_is_absent_unless_asked_for(self, client):
+        client.post("/api/v1/tasks", json={"title": "Task"})
+        assert "X-Total-Count" not in client.get("/api/v1/tasks").headers
+
+    def test_status_totals_are_exact_and_skip_the_tasks_table(self, client):
+        for status in ("pending", "pending", "completed"):
+            client.post("/api/v1/tasks", json={"title": "Task", "status": status})
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            response = client.get("/api/v1/tasks?status=pending&limit=1&include_total=true")
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        assert len(response.json()) == 1
+        assert response.headers["X-Total-Count"] == "2"
+        assert response.headers["X-Total-Count-Accuracy"] == "exact"
+        counts = [s for s in statements if "count" in s.lower()]
+        assert counts and all("FROM tasks" not in s for s in counts)
+
+        response = client.get("/api/v1/tasks?include_total=true")
+        assert response.headers["X-Total-Count"] == "3"
+
+    def test_search_totals_are_cached_as_estimates(self, client):
+        client.post("/api/v1/tasks", json={"title": "Buy milk"})
+        client.post("/api/v1/tasks", json={"title": "Buy eggs"})
+        response = client.get("/api/v1/tasks?search=buy&limit=1&include_total=true")
+        assert response.headers["X-Total-Count"] == "2"
+        assert response.headers["X-Total-Count-Accuracy"] == "exact"
+
+        client.post("/api/v1/tasks", json={"title": "Buy bread"})
+        response = client.get("/api/v1/tasks?search=buy&limit=1&include_total=true")
+        assert response.headers["X-Total-Count"] == "2"
+        assert response.headers["X-Total-Count-Accuracy"] == "estimated"
+
+        # Each filter set has its own entry
+        response = client.get(
+            "/api/v1/tasks?search=buy&search_mode=fulltext&limit=1&include_total=true"
+        )
+        assert response.headers["X-Total-Count"] == "3"
+        assert response.headers["X-Total-Count-Accuracy"] == "exact"
+
+    def test_total_ignores_paging(self, client):
+        for i in range(3):
+            client.post("/api/v1/tasks", json={"title": f"Task {i}"})
+        response = client.get(f"/api/v1/tasks?cursor={encode_cursor(2)}&include_total=true")
+        assert len(response.json()) == 1
+        assert response.headers["X-Total-Count"] == "3"
+
+    def test_total_header_is_exposed_to_browsers(self, client):
+        response = client.get(
+            "/api/v1/tasks?include_total=true", headers={"Origin": "http://localhost:3000"}
+        )
+        assert "X-Total-Count" in response.headers["Access-Control-Expose-Headers"]
+
+
+class TestExportTasks:
+    def test_export_ndjson(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "export_batch_size", 2)
+        for i in range(5):
+            client.post("/api/v1/tasks", json={"title": f"Task {i}"})
+        response = client.get("/api/v1/tasks/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = response.content.splitlines()
+        assert [json.loads(line)["title"] for line in lines] == [f"Task {i}" for i in range(5)]
+        listed = client.get("/api/v1/tasks").json()
+        assert [json.loads(line) for line in lines] == listed
+
+    def test_export_holds_no_connection_between_batches(self, tmp_path):
+        file_engine = create_engine(f"sqlite:///{tmp_path / 'tasks.db'}")
+        Base.metadata.create_all(file_engine)
+        with Session(file_engine) as db:
+            db.add_all(TaskDB(title=f"Task {i}") for i in range(5))
+            db.commit()
+            batches = []
+            for batch in crud.stream_tasks(db, batch_size=2):
+                assert file_engine.pool.checkedout() == 0
+                batches.append([row.title for row in batch])
+        file_engine.dispose()
+        assert batches == [["Task 0", "Task 1"], ["Task 2", "Task 3"], ["Task 4"]]
+
+    def test_export_csv(self, client):
+        client.post("/api/v1/tasks", json={"title": 'Comma, "quoted"', "description": None})
+        response = client.get("/api/v1/tasks/export?format=csv")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="tasks.csv"' in response.headers["content-disposition"]
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 1
+        assert rows[0]["title"] == 'Comma, "quoted"'
+        assert rows[0]["description"] == ""
+        assert rows[0]["status"] == "pending"
+
+    def test_export_csv_empty_has_header(self, client):
+        response = client.get("/api/v1/tasks/export?format=csv")
+        assert response.text.splitlines() == ["id,title,description,status,created_at,updated_at"]
+
+    def test_export_filters(self, client):
+        client.post("/api/v1/tasks", json={"title": "Buy milk", "status": "completed"})
+        client.post("/api/v1/tasks", json={"title": "Buy bread"})
+        client.post("/api/v1/tasks", json={"title": "Walk dog", "status": "completed"})
+        response = client.get("/api/v1/tasks/export?status=completed&search=buy")
+        titles = [json.loads(line)["title"] for line in response.content.splitlines()]
+        assert titles == ["Buy milk"]
+
+    def test_export_invalid_format(self, client):
+        assert client.get("/api/v1/tasks/export?format=xml").status_code == 422
+
+    def test_export_requires_auth(self, unauthenticated_client):
+        response = unauthenticated_client.get("/api/v1/tasks/export")
+        assert response.status_code in (401, 403)
+
+
+class TestImportTasks:
+    def test_import_ndjson(self, client):
+        body = b'{"title": "One"}\n\n{"title": "Two", "status": "completed"}\r\n'
+        response = client.post("/api/v1/tasks/import", content=body)
+        assert response.status_code == 200
+        assert response.json() == {"imported": 2, "failed": 0, "dry_run": False, "errors": []}
+        tasks = client.get("/api/v1/tasks").json()
+        assert [(t["title"], t["status"]) for t in tasks] == [
+            ("One", "pending"),
+            ("Two", "completed"),
+        ]
+        assert [t["title"] for t in client.get("/api/v1/tasks?search=two").json()] == ["Two"]
+
+    def test_import_reports_line_errors(self, client):
+        body = b'{"title": "Good"}\n{"title": "x" \n{"status": "pending"}\n{"title": "Also good"}\n'
+        response = client.post("/api/v1/tasks/import", content=body)
+        data = response.json()
+        assert (data["imported"], data["failed"]) == (2, 2)
+        assert [error["line"] for error in data["errors"]] == [2, 3]
+        assert "title" in data["errors"][1]["detail"]
+        assert len(client.get("/api/v1/tasks").json()) == 2
+
+    def test_import_line_with_two_objects_is_an_error(self, client):
+        body = b'{"title": "A"},{"title": "B"}\n{"title": "C"}\n'
+        data = client.post("/api/v1/tasks/import", content=body).json()
+        assert (data["imported"], data["failed"]) == (1, 1)
+        assert data["errors"][0]["line"] == 1
+
+    def test_import_object_split_across_lines_is_an_error(self, client):
+        body = b'{"title":"A"},{"title":"B"\n"description":"x"}\n'
+        data = client.post("/api/v1/tasks/import", content=body).json()
+        assert (data["imported"], data["failed"]) == (0, 2)
+        assert client.get("/api/v1/tasks").json() == []
+
+    def test_import_line_too_long_is_an_error(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "import_max_line_bytes", 32)
+        body = b'{"title": "' + b"x" * 100 + b'"}\n{"title": "Short"}\n'
+        data = client.post("/api/v1/tasks/import", content=body).json()
+        assert (data["imported"], data["failed"]) == (1, 1)
+        assert data["errors"][0]["line"] == 1
+        assert "longer than 32 bytes" in data["errors"][0]["detail"]
+
+    def test_import_csv_record_too_long(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "import_max_line_bytes", 32)
+        body = b'title\n"' + b"x\n" * 50 + b'"\n'
+        response = client.post("/api/v1/tasks/import?format=csv", content=body)
+        assert response.status_code == 400
+        assert "line 2" in response.json()["detail"]
+
+    def test_import_commits_in_chunks(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "import_chunk_size", 2)
+        statements = []
+
+        def count_inserts(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("INSERT INTO tasks "):
+                statements.append(statement)
+
+        body = b"".join(b'{"title": "Task %d"}\n' % i for i in range(5))
+        event.listen(engine, "before_cursor_execute", count_inserts)
+        try:
+            response = client.post("/api/v1/tasks/import", content=body)
+        finally:
+            event.remove(engine, "before_cursor_execute", count_inserts)
+        assert response.json()["imported"] == 5
+        # One INSERT ... SELECT FROM json_each per chunk
+        assert len(statements) == 3
+        assert len(client.get("/api/v1/tasks").json()) == 5
+
+    def test_import_dry_run(self, client):
+        body = b'{"title": "One"}\n{"title": "Two", "status": "nope"}\n'
+        response = client.post("/api/v1/tasks/import?dry_run=true", content=body)
+        data = response.json()
+        assert (data["imported"], data["failed"], data["dry_run"]) == (1, 1, True)
+        assert client.get("/api/v1/tasks").json() == []
+
+    def test_import_csv(self, client):
+        body = (
+            b"\xef\xbb\xbftitle,description,status\n"
+            b'Plain,,\n"Multi\nline, ""quoted""",desc,completed\nBad,,unknown\n'
+        )
+        response = client.post("/api/v1/tasks/import?format=csv", content=body)
+        data = response.json()
+        assert (data["imported"], data["failed"]) == (2, 1)
+        assert data["errors"][0]["line"] == 5
+        tasks = client.get("/api/v1/tasks").json()
+        assert tasks[0]["description"] is None
+        assert tasks[1]["title"] == 'Multi\nline, "quoted"'
+        assert tasks[1]["status"] == "completed"
+
+    def test_import_csv_round_trips_export(self, client):
+        client.post("/api/v1/tasks", json={"title": "A, b", "description": "c\nd"})
+        client.post("/api/v1/tasks", json={"title": "E", "status": "in_progress"})
+        exported = client.get("/api/v1/tasks/export?format=csv").content
+        data = client.post("/api/v1/tasks/import?format=csv", content=exported).json()
+        assert data["imported"] == 2
+        tasks = client.get("/api/v1/tasks").json()
+        strip = [{k: t[k] for k in ("title", "description", "status")} for t in tasks]
+        assert strip[2:] == strip[:2]
+
+    def test_import_csv_requires_title_column(self, client):
+        response = client.post("/api/v1/tasks/import?format=csv", content=b"name\nx\n")
+        assert response.status_code == 400
+
+    def test_import_requires_auth(self, unauthenticated_client):
+        response = unauthenticated_client.post("/api/v1/tasks/import", content=b"")
+        assert response.status_code in (401, 403)
+
 
 class TestGetTask:
     def test_get_task_exists(self, client):
@@ -176,6 +588,68 @@ class TestGetTask:
         assert response.status_code == 404
         assert response.json()["detail"] == "Task not found"
 
+    def test_get_task_served_from_cache(self, client):
+        task_id = client.post("/api/v1/tasks", json={"title": "Cached"}).json()["id"]
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            response = client.get(f"/api/v1/tasks/{task_id}")
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        assert response.json()["title"] == "Cached"
+        assert statements == []
+
+    def test_get_task_cache_matches_default_encoding(self, client, db_session):
+        task_id = client.post("/api/v1/tasks", json={"title": 'Täsk ✓ "q" </x>\u2028'}).json()["id"]
+        cached = client.get(f"/api/v1/tasks/{task_id}").content
+        task_cache.clear()
+        filled = client.get(f"/api/v1/tasks/{task_id}").content
+        row = db_session.get(TaskDB, task_id)
+        expected = JSONResponse(jsonable_encoder(TaskResponse.model_validate(row))).body
+        assert cached == expected
+        assert filled == expected
+
+    def test_get_task_miss_does_not_replace_newer_write(self, client, monkeypatch):
+        task_id = client.post("/api/v1/tasks", json={"title": "Old"}).json()["id"]
+        task_cache.clear()
+        real_get_task = crud.get_task
+
+        def get_task_then_update(db, task_id):
+            row = real_get_task(db, task_id)
+            db.expunge(row)
+            monkeypatch.setattr(crud, "get_task", real_get_task)
+            client.put(f"/api/v1/tasks/{task_id}", json={"title": "New"})
+            return row
+
+        monkeypatch.setattr(crud, "get_task", get_task_then_update)
+        assert client.get(f"/api/v1/tasks/{task_id}").json()["title"] == "Old"
+        assert client.get(f"/api/v1/tasks/{task_id}").json()["title"] == "New"
+
+    def test_get_task_does_not_fill_from_replica(self, client, monkeypatch):
+        task_id = client.post("/api/v1/tasks", json={"title": "Task"}).json()["id"]
+        task_cache.clear()
+        monkeypatch.setattr(settings, "database_read_url", "sqlite:///replica.db")
+        assert client.get(f"/api/v1/tasks/{task_id}").status_code == 200
+        assert task_cache.get(task_id) is None
+
+    def test_get_task_cache_follows_writes(self, client):
+        created = client.post(
+            "/api/v1/tasks:batch", json=[{"title": "A"}, {"title": "B", "status": "completed"}]
+        ).json()
+        first, second = (task["id"] for task in created)
+        client.put(f"/api/v1/tasks/{first}", json={"title": "A2"})
+        assert client.get(f"/api/v1/tasks/{first}").json()["title"] == "A2"
+        client.patch("/api/v1/tasks:batch", json=[{"id": first, "title": "A3"}])
+        assert client.get(f"/api/v1/tasks/{first}").json()["title"] == "A3"
+        client.delete("/api/v1/tasks?status=completed")
+        assert client.get(f"/api/v1/tasks/{second}").status_code == 404
+        client.delete(f"/api/v1/tasks/{first}")
+        assert client.get(f"/api/v1/tasks/{first}").status_code == 404
+
 
 class TestUpdateTask:
     def test_update_task_partial(self, client):
@@ -218,3 +692,262 @@ class TestDeleteTask:
         response = client.delete("/api/v1/tasks/999")
         assert response.status_code == 404
         assert response.json()["detail"] == "Task not found"
+
+
+class TestConditionalRequests:
+    def test_get_task_etag_and_not_modified(self, client):
+        task_id = client.post("/api/v1/tasks", json={"title": "Task"}).json()["id"]
+        response = client.get(f"/api/v1/tasks/{task_id}")
+        etag = response.headers["ETag"]
+        assert etag.startswith(f'"{task_id}-')
+        assert "Last-Modified" in response.headers
+
+        response = client.get(f"/api/v1/tasks/{task_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+        client.put(f"/api/v1/tasks/{task_id}", json={"title": "Changed"})
+        response = client.get(f"/api/v1/tasks/{task_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_get_task_if_modified_since(self, client):
+        response = client.post("/api/v1/tasks", json={"title": "Task"})
+        task_id = response.json()["id"]
+        last_modified = response.headers["Last-Modified"]
+        response = client.get(
+            f"/api/v1/tasks/{task_id}", headers={"If-Modified-Since": last_modified}
+        )
+        assert response.status_code == 304
+        response = client.get(
+            f"/api/v1/tasks/{task_id}",
+            headers={"If-Modified-Since": "Thu, 01 Jan 2004 00:00:00 GMT"},
+        )
+        assert response.status_code == 200
+
+    def test_list_etag(self, client):
+        client.post("/api/v1/tasks", json={"title": "Task"})
+        response = client.get("/api/v1/tasks?limit=1")
+        etag = response.headers["ETag"]
+        assert etag.startswith('W/"')
+
+        client.post("/api/v1/tasks", json={"title": "Another"})
+        response = client.get("/api/v1/tasks?limit=1", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["X-Next-Cursor"]
+
+        response = client.get("/api/v1/tasks", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+
+    def test_list_etag_changes_when_page_changes(self, client):
+        created = client.post("/api/v1/tasks:batch", json=[{"title": "A"}] * 3).json()
+        ids = [task["id"] for task in created]
+        etag = client.get("/api/v1/tasks?limit=2").headers["ETag"]
+        client.delete(f"/api/v1/tasks/{ids[1]}")
+        response = client.get("/api/v1/tasks?limit=2", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+
+    def test_update_if_match(self, client):
+        response = client.post("/api/v1/tasks", json={"title": "Task"})
+        task_id, etag = response.json()["id"], response.headers["ETag"]
+
+        response = client.put(
+            f"/api/v1/tasks/{task_id}", json={"title": "First"}, headers={"If-Match": etag}
+        )
+        assert response.status_code == 200
+        new_etag = response.headers["ETag"]
+        assert new_etag != etag
+
+        response = client.put(
+            f"/api/v1/tasks/{task_id}", json={"title": "Second"}, headers={"If-Match": etag}
+        )
+        assert response.status_code == 412
+        assert client.get(f"/api/v1/tasks/{task_id}").json()["title"] == "First"
+
+    def test_update_if_match_missing_task(self, client):
+        response = client.put(
+            "/api/v1/tasks/999", json={"title": "X"}, headers={"If-Match": '"999-1"'}
+        )
+        assert response.status_code == 404
+
+    def test_delete_if_match(self, client):
+        response = client.post("/api/v1/tasks", json={"title": "Task"})
+        task_id, etag = response.json()["id"], response.headers["ETag"]
+        client.put(f"/api/v1/tasks/{task_id}", json={"title": "Changed"})
+
+        response = client.delete(f"/api/v1/tasks/{task_id}", headers={"If-Match": etag})
+        assert response.status_code == 412
+        etag = client.get(f"/api/v1/tasks/{task_id}").headers["ETag"]
+        response = client.delete(f"/api/v1/tasks/{task_id}", headers={"If-Match": etag})
+        assert response.status_code == 204
+
+
+class TestBatchTasks:
+    def test_batch_create(self, client):
+        response = client.post(
+            "/api/v1/tasks:batch",
+            json=[{"title": "First"}, {"title": "Second", "status": "completed"}],
+        )
+        assert response.status_code == 201
+        data = response.json()
+        assert [task["title"] for task in data] == ["First", "Second"]
+        assert [task["status"] for task in data] == ["pending", "completed"]
+        assert len(client.get("/api/v1/tasks").json()) == 2
+
+    def test_batch_create_is_atomic(self, client):
+        response = client.post(
+            "/api/v1/tasks:batch", json=[{"title": "Valid"}, {"title": "x" * 201}]
+        )
+        assert response.status_code == 422
+        assert client.get("/api/v1/tasks").json() == []
+
+    def test_batch_create_too_large(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "max_batch_size", 2)
+        response = client.post("/api/v1/tasks:batch", json=[{"title": "Task"}] * 3)
+        assert response.status_code == 413
+
+    def test_batch_update(self, client):
+        created = client.post(
+            "/api/v1/tasks:batch", json=[{"title": "One"}, {"title": "Two"}]
+        ).json()
+        response = client.patch(
+            "/api/v1/tasks:batch",
+            json=[
+                {"id": created[1]["id"], "status": "completed"},
+                {"id": 999, "title": "Missing"},
+                {"id": created[0]["id"], "title": "Uno"},
+            ],
+        )
+        assert response.status_code == 200
+        results = response.json()
+        assert [r["result"] for r in results] == ["updated", "not_found", "updated"]
+        assert results[0]["task"]["status"] == "completed"
+        assert results[0]["task"]["title"] == "Two"
+        assert results[1]["task"] is None
+        assert results[2]["task"]["title"] == "Uno"
+
+    @pytest.mark.parametrize("field", ["title", "status"])
+    def test_batch_update_rejects_null(self, client, field):
+        task_id = client.post("/api/v1/tasks", json={"title": "Task"}).json()["id"]
+        response = client.patch("/api/v1/tasks:batch", json=[{"id": task_id, field: None}])
+        assert response.status_code == 422
+        assert client.get(f"/api/v1/tasks/{task_id}").json()["title"] == "Task"
+
+    def test_batch_update_duplicate_ids(self, client):
+        response = client.patch(
+            "/api/v1/tasks:batch", json=[{"id": 1, "title": "A"}, {"id": 1, "title": "B"}]
+        )
+        assert response.status_code == 422
+
+    def test_delete_by_status(self, client):
+        client.post(
+            "/api/v1/tasks:batch",
+            json=[
+                {"title": "Done 1", "status": "completed"},
+                {"title": "Open"},
+                {"title": "Done 2", "status": "completed"},
+            ],
+        )
+        response = client.delete("/api/v1/tasks?status=completed")
+        assert response.status_code == 200
+        assert response.json() == {"deleted": 2}
+        assert [task["title"] for task in client.get("/api/v1/tasks").json()] == ["Open"]
+
+    def test_delete_requires_filter(self, client):
+        response = client.delete("/api/v1/tasks")
+        assert response.status_code == 422
+
+
+class TestWriteStatements:
+    """Single-row writes must cost exactly one SQL statement."""
+
+    def _statements(self, send):
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement.split()[0].upper())
+
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            response = send()
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        return response, statements
+
+    def test_create_is_single_insert(self, client):
+        response, statements = self._statements(
+            lambda: client.post("/api/v1/tasks", json={"title": "Task"})
+        )
+        assert response.status_code == 201
+        assert statements == ["INSERT"]
+
+    def test_update_is_single_update(self, client):
+        task_id = client.post("/api/v1/tasks", json={"title": "Task"}).json()["id"]
+        response, statements = self._statements(
+            lambda: client.put(f"/api/v1/tasks/{task_id}", json={"status": "completed"})
+        )
+        assert response.status_code == 200
+        assert response.json()["status"] == "completed"
+        assert statements == ["UPDATE"]
+
+    def test_delete_is_single_delete(self, client):
+        task_id = client.post("/api/v1/tasks", json={"title": "Task"}).json()["id"]
+        response, statements = self._statements(lambda: client.delete(f"/api/v1/tasks/{task_id}"))
+        assert response.status_code == 204
+        assert statements == ["DELETE"]
+
+
+class TestQueryPlans:
+    """Every filtered list query must be answered from an index, never a table scan."""
+
+    FILTERED_QUERIES = [
+        f"?cursor={encode_cursor(2)}",
+        "?status=pending",
+        f"?status=pending&cursor={encode_cursor(2)}",
+        "?search=task",
+        "?search=task&status=pending",
+        f"?search=task&cursor={encode_cursor(2)}",
+        "?search=task&search_mode=fulltext&rank=true",
+        "?search=task&status=completed&search_mode=fulltext&rank=true",
+    ]
+
+    def _plans(self, client, query):
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT") and "FROM tasks" in statement:
+                statements.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            assert client.get(f"/api/v1/tasks{query}").status_code == 200
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+
+        assert statements
+        with engine.connect() as conn:
+            return [
+                [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)]
+                for sql, params in statements
+            ]
+
+    @pytest.fixture
+    def populated_client(self, client):
+        for i in range(5):
+            client.post("/api/v1/tasks", json={"title": f"Task {i}"})
+        return client
+
+    @pytest.mark.parametrize("query", FILTERED_QUERIES)
+    def test_filtered_list_uses_index(self, populated_client, query):
+        for plan in self._plans(populated_client, query):
+            assert not any(step.split(" USING")[0] == "SCAN tasks" for step in plan), plan
+            # Ranking sorts every match anyway; the id tiebreak makes that a B-tree sort
+            if "rank=true" not in query:
+                assert not any("TEMP B-TREE" in step for step in plan), plan
+
+    def test_unfiltered_list_reads_in_key_order(self, populated_client):
+        # A bare SCAN is fine here: rows come out in rowid order and LIMIT stops it early
+        for plan in self._plans(populated_client, "?limit=2"):
+            assert not any("TEMP B-TREE" in step for step in plan), plan